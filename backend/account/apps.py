@@ -5,3 +5,6 @@ class AccountConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'account'
     verbose_name = 'Аккаунт'
+
+    def ready(self):
+        import account.signals  # noqa: F401
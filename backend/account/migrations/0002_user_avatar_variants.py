@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 03:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Уменьшенные копии аватара в JPEG и WebP.', verbose_name='Копии аватара'),
+        ),
+    ]
@@ -29,6 +29,13 @@ class User(AbstractUser):
     avatar = models.ImageField(
         'Аватар', upload_to='users/', null=True, default=None
     )
+    avatar_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Копии аватара',
+        help_text='Уменьшенные копии аватара в JPEG и WebP.',
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name', 'avatar')
 
@@ -0,0 +1,53 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from account.models import Follow
+from utils.authentication import token_cache
+from utils.conditional import FOLLOWS_VERSION, USERS_VERSION
+from utils.versions import bump_version
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Убирает токен из кеша при выходе пользователя.
+
+    TokenDestroyView из djoser удаляет токены пользователя через
+    QuerySet.delete, который отправляет post_delete для каждого токена.
+    Запись удаляется после фиксации транзакции, чтобы параллельный
+    запрос не закешировал токен заново до удаления строки.
+    """
+    transaction.on_commit(partial(token_cache.delete, instance.key))
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields, **kwargs):
+    """Убирает из кеша токены пользователя после правки профиля.
+
+    Так деактивированный пользователь сразу теряет доступ, а
+    /api/users/me/ не отдает устаревшие данные. Версия списка
+    пользователей меняется и при регистрации.
+    """
+    if update_fields == frozenset(('last_login',)):
+        return
+    bump_version(USERS_VERSION)
+    if not created:
+        transaction.on_commit(partial(token_cache.delete_user, instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    """Меняет версию списка пользователей после удаления профиля."""
+    bump_version(USERS_VERSION)
+
+
+@receiver((post_save, post_delete), sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    """Меняет версию подписок пользователя при подписке и отписке."""
+    bump_version(FOLLOWS_VERSION, instance.user_id)
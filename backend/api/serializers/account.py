@@ -7,7 +7,8 @@ from rest_framework import serializers
 from account.models import Follow
 from cooking.models import Recipe
 from utils.constants import LENGTH_EMAIL, LENGTH_NAME
-from utils.fields import Base64ImageField
+from utils.fields import Base64ImageField, ImageVariantsField
+from utils.loaders import get_author_recipes, get_subscribed_ids
 
 User = get_user_model()
 
@@ -60,6 +61,7 @@ class UserSerializer(serializers.ModelSerializer):
 
     is_subscribed = serializers.SerializerMethodField()
     avatar = serializers.SerializerMethodField()
+    avatar_variants = ImageVariantsField()
 
     class Meta:
         model = User
@@ -71,6 +73,7 @@ class UserSerializer(serializers.ModelSerializer):
             'last_name',
             'is_subscribed',
             'avatar',
+            'avatar_variants',
         )
         read_only_fields = ('id', 'first_name', 'last_name')
 
@@ -78,30 +81,34 @@ class UserSerializer(serializers.ModelSerializer):
         return obj.get_photo_url() if obj.avatar else None
 
     def get_is_subscribed(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return Follow.objects.filter(user=user, following=obj).exists()
-        return False
+        return obj.pk in get_subscribed_ids(self.context)
 
 
 class RecipeDetailSerializer(serializers.ModelSerializer):
     """Сериализатор для наследования FollowersSerializer."""
 
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
 
 class FollowersSerializer(serializers.ModelSerializer):
-    """Сериализатор для полного отображения информации о фоловерах."""
+    """Сериализатор для полного отображения информации о фоловерах.
+
+    Рецепты и их число для всех авторов страницы загружаются одним
+    запросом, поэтому число запросов не зависит от размера страницы.
+    """
 
     email = serializers.EmailField(source='following.email')
     id = serializers.IntegerField(source='following.id')
     username = serializers.CharField(source='following.username')
     first_name = serializers.CharField(source='following.first_name')
     last_name = serializers.CharField(source='following.last_name')
-    recipes_count = serializers.IntegerField(read_only=True)
+    recipes_count = serializers.SerializerMethodField()
     avatar = serializers.SerializerMethodField()
+    avatar_variants = ImageVariantsField(source='following.avatar_variants')
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
 
@@ -117,30 +124,36 @@ class FollowersSerializer(serializers.ModelSerializer):
             'recipes',
             'recipes_count',
             'avatar',
+            'avatar_variants',
         )
 
     def get_avatar(self, obj):
-        try:
-            return obj.following.avatar.get_photo_url()
-        except AttributeError:
-            return None
+        return obj.following.get_photo_url()
 
     def get_is_subscribed(self, obj):
-        user = self.context['request'].user
-        return Follow.objects.filter(
-            user=user, following=obj.following
-        ).exists()
+        """Каждая строка — подписка текущего пользователя."""
+        return True
+
+    def get_author_recipes(self, obj):
+        if isinstance(self.root, serializers.ListSerializer):
+            follows = self.root.instance
+        else:
+            follows = (obj,)
+        loaded = get_author_recipes(
+            self.context,
+            [follow.following_id for follow in follows],
+            self.context.get('recipes_limit'),
+        )
+        return loaded.get(obj.following_id, ((), 0))
 
     def get_recipes(self, obj):
-        following_user = obj.following
-        recipes_limit = self.context.get('recipes_limit')
-
-        recipes = Recipe.objects.filter(author=following_user)
-        if recipes_limit is not None:
-            recipes = recipes[: int(recipes_limit)]
-
+        recipes, _ = self.get_author_recipes(obj)
         return RecipeDetailSerializer(recipes, many=True).data
 
+    def get_recipes_count(self, obj):
+        _, count = self.get_author_recipes(obj)
+        return count
+
 
 class FollowSerializer(serializers.ModelSerializer):
     """Сериализатор для создания подписки.
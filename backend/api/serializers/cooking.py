@@ -1,4 +1,5 @@
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
@@ -12,7 +13,13 @@ from cooking.models import (
     ShoppingCart,
     Tag,
 )
-from utils.fields import Base64ImageField
+from utils.constants import BULK_RECIPES_MAX_SIZE
+from utils.fields import (
+    Base64ImageField,
+    BulkPrimaryKeyRelatedField,
+    ImageVariantsField,
+    get_objects_in_bulk,
+)
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -47,19 +54,39 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
+class AddIngredientListSerializer(serializers.ListSerializer):
+    """Список ингредиентов рецепта с загрузкой одним запросом.
+
+    Элементы проверяются по отдельности, а сами ингредиенты выбираются
+    вместе после этого; в `ingredient` подставляются объекты.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        ingredients = get_objects_in_bulk(
+            Ingredient.objects.all(),
+            [item['ingredient'] for item in items],
+            'Ингредиенты с id {pk_values} не существуют.',
+        )
+        for item in items:
+            item['ingredient'] = ingredients[item['ingredient']]
+        return items
+
+
 class AddIngredientSerializer(serializers.ModelSerializer):
     """Сериализатор для добавления существующих ингредиентов в рецепт.
 
     Используется для определения поля ingredients в RecipeSerializer.
+    Id ингредиента проверяется здесь только как число, объект
+    загружает AddIngredientListSerializer.
     """
 
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(), source='ingredient'
-    )
+    id = serializers.IntegerField(source='ingredient', min_value=1)
 
     class Meta:
         model = RecipeIngredient
         fields = ('id', 'amount')
+        list_serializer_class = AddIngredientListSerializer
 
 
 class RecipeSerializer(serializers.ModelSerializer):
@@ -67,6 +94,13 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     image = Base64ImageField(required=True, allow_null=True)
     ingredients = AddIngredientSerializer(many=True, required=True)
+    tags = BulkPrimaryKeyRelatedField(
+        queryset=Tag.objects.all(),
+        many=True,
+        error_messages={
+            'does_not_exist': 'Теги с id {pk_values} не существуют.'
+        },
+    )
 
     class Meta:
         model = Recipe
@@ -83,6 +117,12 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only_fields = ('author',)
 
     def validate(self, data):
+        """Проверяет ингредиенты и теги рецепта.
+
+        По спецификации API оба поля обязательны и при PATCH: запрос
+        без них получает 400, поэтому частичное обновление всегда
+        передает полные списки ингредиентов и тегов.
+        """
         ingredients = data.get('ingredients', [])
         if not ingredients:
             raise serializers.ValidationError(
@@ -129,29 +169,90 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         return recipe
 
+    def update_ingredients(self, recipe, ingredients):
+        """Приводит ингредиенты рецепта к переданным по разнице.
+
+        Не больше трех запросов: удаление лишних, обновление
+        изменившихся количеств и вставка новых. Совпадающие строки не
+        трогаются. Текущие ингредиенты берутся из prefetch, если он есть.
+        """
+        current = {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredients.all()
+        }
+        submitted = {
+            item['ingredient'].pk: item['amount'] for item in ingredients
+        }
+        removed = [
+            item.pk
+            for ingredient_id, item in current.items()
+            if ingredient_id not in submitted
+        ]
+        changed = []
+        for ingredient_id, amount in submitted.items():
+            item = current.get(ingredient_id)
+            if item is not None and item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        added = [
+            {'ingredient': item['ingredient'], 'amount': item['amount']}
+            for item in ingredients
+            if item['ingredient'].pk not in current
+        ]
+        if removed:
+            RecipeIngredient.objects.filter(pk__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        if added:
+            self.create_ingredients(recipe, added)
+
+    def update_tags(self, recipe, tags):
+        """Добавляет и убирает только изменившиеся теги рецепта."""
+        current = {tag.pk for tag in recipe.tags.all()}
+        submitted = {tag.pk for tag in tags}
+        if current - submitted:
+            recipe.tags.remove(*(current - submitted))
+        if submitted - current:
+            recipe.tags.add(*(submitted - current))
+
     @transaction.atomic
     def update(self, instance, validated_data):
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
+        """Обновляет рецепт, меняя в ингредиентах и тегах только разницу.
 
-        RecipeIngredient.objects.filter(recipe=instance).delete()
+        Через API списки приходят всегда (см. validate); если они не
+        изменились, запрос обновляет только строку рецепта. Значение
+        None оставлено для вызовов сериализатора из кода без этих полей.
+        """
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
 
-        instance.tags.set(tags)
-        self.create_ingredients(instance, ingredients)
+        if tags is not None:
+            self.update_tags(instance, tags)
+        if ingredients is not None:
+            self.update_ingredients(instance, ingredients)
 
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
-        """Возвращает пользователю полный экземпляр рецепта."""
+        """Возвращает пользователю полный экземпляр рецепта.
+
+        После сохранения кеш prefetch сброшен, поэтому теги и
+        ингредиенты загружаются заново, а не по запросу на строку.
+        """
+        prefetch_related_objects(
+            [instance], 'tags', 'recipe_ingredients__ingredient'
+        )
         return GetRecipeSerializer(instance, context=self.context).data
 
 
 class RecipeDetailSerializer(serializers.ModelSerializer):
     """Сериализатор для отображения краткой информации о рецепте."""
 
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
 
 class GetRecipeSerializer(serializers.ModelSerializer):
@@ -164,6 +265,7 @@ class GetRecipeSerializer(serializers.ModelSerializer):
     )
     is_favorited = serializers.BooleanField(read_only=True)
     is_in_shopping_cart = serializers.BooleanField(read_only=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -176,6 +278,7 @@ class GetRecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time',
         )
@@ -210,3 +313,17 @@ class ShoppingCartSerializer(BaseRecipeActionSerializer):
 
     class Meta(BaseRecipeActionSerializer.Meta):
         model = ShoppingCart
+
+
+class BulkRecipeActionSerializer(serializers.Serializer):
+    """Сериализатор списка рецептов для пакетного добавления и удаления."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_RECIPES_MAX_SIZE,
+    )
+
+    def validate_recipes(self, value):
+        """Убирает повторы, сохраняя порядок id."""
+        return list(dict.fromkeys(value))
@@ -6,6 +6,8 @@ from djoser.views import TokenCreateView, TokenDestroyView
 from api.views.account import FollowersList, FollowView, UserViewSet
 
 from api.views.cooking import (
+    CatalogSnapshotFileView,
+    CatalogSnapshotView,
     IngredientViewSet,
     RecipeGetShortLinkView,
     RecipeViewSet,
@@ -34,5 +36,11 @@ urlpatterns = [
     path('users/', include(account_patterns)),
     path('auth/', include('djoser.urls.authtoken')),
     path('recipes/<int:id>/get-link/', RecipeGetShortLinkView.as_view()),
+    path('catalog/<slug:name>/', CatalogSnapshotView.as_view()),
+    path(
+        'catalog/<slug:name>/<slug:digest>.json',
+        CatalogSnapshotFileView.as_view(),
+        name='catalog-snapshot',
+    ),
     path('', include(router_v1.urls)),
 ]
@@ -1,11 +1,11 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Count
 from django.shortcuts import get_object_or_404
 
 from djoser.serializers import SetPasswordSerializer
 from rest_framework import mixins, generics, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
@@ -17,14 +17,23 @@ from api.serializers.account import (
     FollowersSerializer,
     UserSerializer,
 )
+from utils.conditional import (
+    FOLLOWS_VERSION,
+    USERS_VERSION,
+    ConditionalGetMixin,
+)
+from utils.images import get_current_variants, get_derivative_urls
 from utils.pagination import CustomPageNumberPagination
+from utils.parsers import MultiPartJSONParser
 from utils.permissions import CurrentUserAdminOrReadOnly
+from utils.routers import ReplicaReadMixin
 
 
 User = get_user_model()
 
 
 class UserViewSet(
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -36,6 +45,15 @@ class UserViewSet(
     queryset = User.objects.all()
     permission_classes = (CurrentUserAdminOrReadOnly,)
     pagination_class = CustomPageNumberPagination
+    conditional_actions = ('list', 'retrieve', 'me')
+
+    def get_version_keys(self):
+        """Профили пользователей и подписки зрителя."""
+        keys = [(USERS_VERSION,)]
+        user = self.request.user
+        if user.is_authenticated:
+            keys.append((FOLLOWS_VERSION, user.pk))
+        return keys
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -50,7 +68,7 @@ class UserViewSet(
         serializer.is_valid(raise_exception=True)
 
         self.request.user.set_password(serializer.data['new_password'])
-        self.request.user.save()
+        self.request.user.save(update_fields=('password',))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -65,26 +83,42 @@ class UserViewSet(
         detail=False,
         methods=['put', 'delete'],
         permission_classes=[IsAuthenticated],
+        parser_classes=(JSONParser, MultiPartJSONParser),
         url_path='me/avatar',
     )
     def avatar(self, request, *args, **kwargs):
-        """Добавление обновление и удаление аватара пользователя."""
+        """Добавление обновление и удаление аватара пользователя.
+
+        Пользователь может прийти из кеша токенов и быть устаревшим,
+        поэтому поля аватара перечитываются из БД, а сохраняется только
+        сам аватар.
+        """
         user = request.user
+        user.refresh_from_db(fields=('avatar', 'avatar_variants'))
 
         if request.method == 'PUT':
             serializer = AvatarSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
 
             user.avatar = serializer.validated_data['avatar']
-            user.save()
+            user.save(update_fields=('avatar',))
 
             return Response(
-                {'avatar': user.get_photo_url()}, status=status.HTTP_200_OK
+                {
+                    'avatar': user.get_photo_url(),
+                    'avatar_variants': get_derivative_urls(
+                        get_current_variants(
+                            user.avatar_variants, user.avatar
+                        ),
+                        request,
+                    ),
+                },
+                status=status.HTTP_200_OK,
             )
         if user.avatar:
-            user.avatar.delete()
+            user.avatar.delete(save=False)
 
-        user.save()
+        user.save(update_fields=('avatar',))
 
         return Response(
             {'status': 'Аватар удален'}, status=status.HTTP_204_NO_CONTENT
@@ -98,54 +132,54 @@ class UserViewSet(
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class FollowersList(generics.ListAPIView):
+class RecipesLimitMixin:
+    """Передает в контекст сериализатора параметр recipes_limit."""
+
+    def get_recipes_limit(self):
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit is None:
+            return None
+        if not recipes_limit.isdigit():
+            raise ValidationError(
+                {'recipes_limit': 'Укажите целое неотрицательное число.'}
+            )
+        return int(recipes_limit)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['recipes_limit'] = self.get_recipes_limit()
+        return context
+
+
+class FollowersList(
+    ReplicaReadMixin, RecipesLimitMixin, generics.ListAPIView
+):
     """Дженерик для отображения списка подписок."""
 
     serializer_class = FollowersSerializer
     pagination_class = CustomPageNumberPagination
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = (
-            Follow.objects.filter(user=user)
-            .prefetch_related('following__recipes')
-            .annotate(recipes_count=Count('following__recipes', distinct=True))
+        return (
+            Follow.objects.filter(user=self.request.user)
+            .select_related('following')
+            .order_by('id')
         )
 
-        return queryset
 
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        recipes_limit = self.request.query_params.get('recipes_limit', None)
-        context['recipes_limit'] = recipes_limit
-        return context
-
-
-class FollowView(generics.CreateAPIView, generics.DestroyAPIView):
+class FollowView(
+    RecipesLimitMixin, generics.CreateAPIView, generics.DestroyAPIView
+):
     """Дженерик для создания и удаления подписки."""
 
     queryset = Follow.objects.all()
     serializer_class = FollowSerializer
 
-    def get_following_user(self):
-        following_id = self.kwargs.get('following_id')
-        try:
-            following_user = User.objects.annotate(
-                recipes_count=Count('recipes')
-            ).get(pk=following_id)
-        except User.DoesNotExist:
-            return get_object_or_404(User, pk=following_id)
-        return following_user
-
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        recipes_limit = self.request.query_params.get('recipes_limit', None)
-        context['recipes_limit'] = recipes_limit
-        return context
-
     def post(self, request, *args, **kwargs):
         user = request.user
-        following_user = self.get_following_user()
+        following_user = get_object_or_404(
+            User, pk=self.kwargs.get('following_id')
+        )
 
         if user == following_user:
             raise ValidationError('Невозможно подписаться на себя')
@@ -159,11 +193,8 @@ class FollowView(generics.CreateAPIView, generics.DestroyAPIView):
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        recipes_count = following_user.recipes_count
-
-        response_data = {**serializer.data, 'recipes_count': recipes_count}
 
-        return Response(response_data, status=status.HTTP_201_CREATED)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, following_id, *args, **kwargs):
 
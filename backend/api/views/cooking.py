@@ -1,16 +1,22 @@
-from django.db.models import Exists, OuterRef, Value, BooleanField
-from django.http import HttpResponse
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BooleanField, Exists, OuterRef, Sum, Value
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
 
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.filters import OrderingFilter
 
+from account.models import Follow
 from api.serializers.cooking import (
+    BulkRecipeActionSerializer,
     FavoriteSerializer,
     GetRecipeSerializer,
     IngredientSerializer,
@@ -19,6 +25,7 @@ from api.serializers.cooking import (
     TagSerializer,
 )
 from cooking.models import (
+    FeedEntry,
     Ingredient,
     Recipe,
     RecipeIngredient,
@@ -26,13 +33,45 @@ from cooking.models import (
     Tag,
     Favorite,
 )
-from utils.filters import IngredientFilter, RecipeFilter
-from utils.link_shortener import LinkShortener
-from utils.pagination import CustomPageNumberPagination
+from utils.conditional import (
+    FAVORITES_VERSION,
+    FOLLOWS_VERSION,
+    RECIPES_VERSION,
+    USERS_VERSION,
+    ConditionalGetMixin,
+)
+from utils.constants import CATALOG_SNAPSHOT_MAX_AGE, SHORT_LINK_MAX_AGE
+from utils.filters import (
+    IngredientFilter,
+    RecipeFilter,
+    RecipeOrderingFilter,
+)
+from utils.ingredient_index import INGREDIENTS_VERSION, ingredient_index
+from utils.link_shortener import link_shortener
+from utils.pagination import FeedCursorPagination, RecipePagination
+from utils.parsers import MultiPartJSONParser
 from utils.permissions import IsAuthorOrReadOnly
-
-
-link_shortener = LinkShortener()
+from utils.recipe_actions import ADDED, REMOVED, bulk_add, bulk_remove
+from utils.recipe_cache import (
+    RECIPE_VERSION,
+    TAGS_VERSION,
+    apply_viewer_flags,
+    cache_recipe,
+    get_cached_recipe,
+)
+from utils.renderers import (
+    ShoppingListCSVRenderer,
+    ShoppingListPDFRenderer,
+    ShoppingListTextRenderer,
+)
+from utils.routers import ReplicaReadMixin, primary_reads
+from utils.shopping_list import (
+    CART_VERSION,
+    cache_stream,
+    get_shopping_list_cache_key,
+)
+from utils.snapshots import catalog_snapshots, snapshot_response
+from utils.versions import bump_version
 
 
 class RecipeGetShortLinkView(APIView):
@@ -41,8 +80,7 @@ class RecipeGetShortLinkView(APIView):
     permission_classes = (AllowAny,)
 
     def get(self, request, id):
-        full_link = f'/recipes/{id}/'
-        short_key = link_shortener.shorten_url(full_link)
+        short_key = link_shortener.shorten_recipe_url(id)
         domain = request.build_absolute_uri('/')[:-1]
         short_url = f'{domain}/s/{short_key}'
 
@@ -50,26 +88,93 @@ class RecipeGetShortLinkView(APIView):
 
 
 class RecipeGetFullLinkView(APIView):
-    """Апи-класс для обработки коротких ссылок."""
+    """Апи-класс для обработки коротких ссылок.
+
+    Ссылка не зависит от пользователя, поэтому аутентификация не
+    выполняется, а редирект можно кешировать на стороне клиента.
+    """
 
     permission_classes = (AllowAny,)
+    authentication_classes = ()
 
     def get(self, request, short_key):
         full_url = link_shortener.restore_url(short_key)
-        if full_url != 'URL не найден':
-            return redirect(full_url)
+        if full_url is not None:
+            response = redirect(full_url, permanent=True)
+            patch_cache_control(
+                response, public=True, max_age=SHORT_LINK_MAX_AGE
+            )
+            return response
         return Response(
             {'error': 'URL не найден'}, status=status.HTTP_404_NOT_FOUND
         )
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class CatalogSnapshotView(APIView):
+    """Апи-класс, перенаправляющий на текущий снимок каталога.
+
+    Ответ не кешируется: после правки каталога клиент сразу получает
+    адрес нового снимка.
+    """
+
+    permission_classes = (AllowAny,)
+    authentication_classes = ()
+
+    def get(self, request, name):
+        snapshot = catalog_snapshots.get(name)
+        if snapshot is None:
+            return Response(
+                {'error': 'Каталог не найден'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        response = redirect(
+            reverse(
+                'catalog-snapshot',
+                kwargs={'name': name, 'digest': snapshot.get()['hash']},
+            )
+        )
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class CatalogSnapshotFileView(APIView):
+    """Апи-класс, отдающий снимок каталога по хешу содержимого.
+
+    Содержимое по такому адресу никогда не меняется, поэтому ответ
+    кешируется клиентом надолго и без перепроверки.
+    """
+
+    permission_classes = (AllowAny,)
+    authentication_classes = ()
+
+    def get(self, request, name, digest):
+        snapshot = catalog_snapshots.get(name)
+        data = snapshot and snapshot.get_by_hash(digest)
+        if data is None:
+            return Response(
+                {'error': 'Снимок не найден'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        response = snapshot_response(data, request)
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=CATALOG_SNAPSHOT_MAX_AGE,
+            immutable=True,
+        )
+        return response
+
+
+class RecipeViewSet(
+    ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     """Вьюсет для работы с рецептами, включая скачивание списка покупок."""
 
     permission_classes = (IsAuthorOrReadOnly,)
     serializer_class = RecipeSerializer
-    filter_backends = (DjangoFilterBackend, OrderingFilter)
-    pagination_class = CustomPageNumberPagination
+    filter_backends = (DjangoFilterBackend, RecipeOrderingFilter)
+    pagination_class = RecipePagination
+    parser_classes = (JSONParser, MultiPartJSONParser)
     filterset_fields = (
         'tags__slug',
         'author',
@@ -78,6 +183,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     filterset_class = RecipeFilter
     ordering = ('-id',)
+    conditional_actions = ('list', 'retrieve', 'feed')
 
     def get_queryset(self):
         user = self.request.user
@@ -103,6 +209,77 @@ class RecipeViewSet(viewsets.ModelViewSet):
             )
         return queryset
 
+    def get_version_keys(self):
+        """Рецепт или список рецептов, каталоги и списки зрителя.
+
+        Правка автора меняет версии всех его рецептов и списка
+        пользователей, поэтому отдельная версия автора не нужна.
+        """
+        keys = [(TAGS_VERSION,), (INGREDIENTS_VERSION,)]
+        if self.action == 'retrieve':
+            recipe_id = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            keys.append((RECIPE_VERSION, recipe_id))
+        else:
+            keys.extend(((RECIPES_VERSION,), (USERS_VERSION,)))
+        user = self.request.user
+        if user.is_authenticated:
+            keys.extend(
+                (
+                    (FAVORITES_VERSION, user.pk),
+                    (CART_VERSION, user.pk),
+                    (FOLLOWS_VERSION, user.pk),
+                )
+            )
+        return keys
+
+    def retrieve(self, request, *args, **kwargs):
+        """Отдает рецепт из кеша, добавляя поля текущего пользователя.
+
+        Общая для всех часть ответа (теги, автор, ингредиенты) кешируется
+        по id и версии рецепта, поля зрителя вычисляются одним запросом.
+        Кешируемая часть читается из основной БД, а не из реплики.
+        """
+        recipe_id = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        data, cache_key = get_cached_recipe(
+            recipe_id, request.build_absolute_uri('/')
+        )
+        if data is None:
+            with primary_reads():
+                instance = self.get_object()
+                data = self.get_serializer(instance).data
+            cache_recipe(cache_key, data)
+            return Response(data)
+        return Response(
+            apply_viewer_flags(data, *self.get_viewer_flags(recipe_id))
+        )
+
+    def get_viewer_flags(self, recipe_id):
+        """Возвращает избранное, корзину и подписку на автора для зрителя."""
+        user = self.request.user
+        if not user.is_authenticated:
+            return False, False, False
+        flags = (
+            Recipe.objects.filter(pk=recipe_id)
+            .annotate(
+                favorited=Exists(
+                    Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+                ),
+                in_shopping_cart=Exists(
+                    ShoppingCart.objects.filter(
+                        user=user, recipe=OuterRef('pk')
+                    )
+                ),
+                subscribed=Exists(
+                    Follow.objects.filter(
+                        user=user, following=OuterRef('author_id')
+                    )
+                ),
+            )
+            .values_list('favorited', 'in_shopping_cart', 'subscribed')
+            .first()
+        )
+        return flags or (False, False, False)
+
     def create(self, request, *args, **kwargs):
         """Создает рецепт и возвращает его с дополнительными полями."""
         serializer = self.get_serializer(data=request.data)
@@ -145,6 +322,61 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+    def bulk_favorite_cart(self, model, version=None):
+        """Пакетное добавление/удаление рецептов из избранного и корзины.
+
+        Все рецепты обрабатываются в одной транзакции фиксированным
+        числом запросов. Ответ содержит статус для каждого id. Сигналы
+        моделей при пакетной записи не отправляются, поэтому версия
+        `version` пользователя сбрасывается здесь.
+        """
+        serializer = BulkRecipeActionSerializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        user = self.request.user
+
+        with transaction.atomic():
+            if self.request.method == 'POST':
+                results = bulk_add(model, user, recipe_ids)
+            else:
+                results = bulk_remove(model, user, recipe_ids)
+        if version and any(
+            result in (ADDED, REMOVED) for result in results.values()
+        ):
+            bump_version(version, user.pk)
+
+        return Response(
+            {
+                'results': [
+                    {'id': recipe_id, 'status': result}
+                    for recipe_id, result in results.items()
+                ]
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(
+        methods=['POST', 'DELETE'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        url_path='favorite',
+        url_name='favorite-bulk',
+    )
+    def favorite_bulk(self, request):
+        """Добавляет или удаляет из избранного список рецептов."""
+        return self.bulk_favorite_cart(Favorite, FAVORITES_VERSION)
+
+    @action(
+        methods=['POST', 'DELETE'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk',
+    )
+    def shopping_cart_bulk(self, request):
+        """Добавляет или удаляет из корзины список рецептов."""
+        return self.bulk_favorite_cart(ShoppingCart, CART_VERSION)
+
     @action(methods=['POST', 'DELETE'], detail=True)
     def favorite(self, request, pk):
         """Добавляет или удаляет рецепт из избранного."""
@@ -158,51 +390,99 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(
         methods=['GET'], detail=False, permission_classes=(IsAuthenticated,)
     )
-    def download_shopping_cart(self, request):
-        """Скачивает список покупок для пользователя."""
-        shopping_carts = ShoppingCart.objects.filter(user=request.user)
-        recipe_ids = shopping_carts.values_list('recipe_id', flat=True)
-        ingredients = self.generate_shopping_list(recipe_ids)
-        return self.create_txt_file(ingredients)
-
-    def generate_shopping_list(self, recipe_ids):
-        """Генерирует список ингредиентов для указанных рецептов."""
-        ingredients = {}
-        recipe_ingredients = RecipeIngredient.objects.filter(
-            recipe_id__in=recipe_ids
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь.
+
+        Страница id рецептов берется из записей FeedEntry курсорной
+        пагинацией, затем рецепты с полями зрителя загружаются по id.
+        """
+        paginator = FeedCursorPagination()
+        entries = paginator.paginate_queryset(
+            FeedEntry.objects.filter(user=request.user).only('recipe_id'),
+            request,
+            self,
         )
+        recipes = self.get_queryset().in_bulk(
+            [entry.recipe_id for entry in entries]
+        )
+        serializer = GetRecipeSerializer(
+            [
+                recipes[entry.recipe_id]
+                for entry in entries
+                if entry.recipe_id in recipes
+            ],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return paginator.get_paginated_response(serializer.data)
 
-        for recipe_ingredient in recipe_ingredients:
-            ingredient_name = recipe_ingredient.ingredient.name
-            amount = recipe_ingredient.amount
-            unit = recipe_ingredient.ingredient.measurement_unit
-
-            if ingredient_name in ingredients:
-                ingredients[ingredient_name]['amount'] += amount
+    @action(
+        methods=['GET'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            ShoppingListTextRenderer,
+            ShoppingListCSVRenderer,
+            ShoppingListPDFRenderer,
+        ),
+    )
+    def download_shopping_cart(self, request):
+        """Скачивает список покупок для пользователя.
+
+        Формат (txt, csv, pdf) выбирается параметром `format` или
+        заголовком Accept. Готовый файл кешируется до изменения корзины.
+        """
+        renderer = request.accepted_renderer
+        cache_key = get_shopping_list_cache_key(request.user, renderer.format)
+        content = cache.get(cache_key)
+
+        if content is not None:
+            response = HttpResponse(
+                content, content_type=renderer.content_type
+            )
+        else:
+            ingredients = self.generate_shopping_list(request.user)
+            chunks = cache_stream(
+                renderer.stream(ingredients.iterator()), cache_key
+            )
+            if renderer.streaming:
+                response = StreamingHttpResponse(
+                    chunks, content_type=renderer.content_type
+                )
             else:
-                ingredients[ingredient_name] = {'amount': amount, 'unit': unit}
-
-        return ingredients
-
-    def create_txt_file(self, ingredients):
-        """Создает текстовый файл со списком ингредиентов."""
-        content = []
-        for name, info in ingredients.items():
-            line = f'{name} ({info["unit"]}) — {info["amount"]}'
-            content.append(line)
-
-        file_content = '\n'.join(content)
-
-        response = HttpResponse(file_content, content_type='text/plain')
+                response = HttpResponse(
+                    b''.join(chunks), content_type=renderer.content_type
+                )
         response['Content-Disposition'] = (
-            'attachment; filename="shopping_list.txt"'
+            f'attachment; filename="shopping_list.{renderer.format}"'
         )
-
         return response
 
+    def generate_shopping_list(self, user):
+        """Суммирует ингредиенты рецептов из корзины одним запросом.
+
+        Рецепты берутся напрямую из корзины пользователя, группировка по
+        названию и единице измерения выполняется в БД, результат отдается
+        кортежами без создания ORM-объектов.
+        """
+        return (
+            RecipeIngredient.objects.filter(
+                recipe_id__in=ShoppingCart.objects.filter(user=user).values(
+                    'recipe_id'
+                )
+            )
+            .values_list('ingredient__name', 'ingredient__measurement_unit')
+            .annotate(amount=Sum('amount'))
+            .order_by('ingredient__name', 'ingredient__measurement_unit')
+        )
+
 
 class TagViewSet(
-    mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
 ):
     """Вьюсет для просмотра тегов."""
 
@@ -210,9 +490,22 @@ class TagViewSet(
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
 
+    def get_version_keys(self):
+        return ((TAGS_VERSION,),)
+
+    def list(self, request, *args, **kwargs):
+        """JSON-список отдается из готового снимка каталога."""
+        if request.accepted_renderer.format == 'json':
+            return snapshot_response(catalog_snapshots['tags'].get(), request)
+        return super().list(request, *args, **kwargs)
+
 
 class IngredientViewSet(
-    mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
 ):
     """Вьюсет для просмотра ингредиентов."""
 
@@ -222,3 +515,20 @@ class IngredientViewSet(
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
     filterset_fields = ('name',)
+
+    def get_version_keys(self):
+        return ((INGREDIENTS_VERSION,),)
+
+    def list(self, request, *args, **kwargs):
+        """Поиск по названию обслуживается из индекса в памяти.
+
+        Полный JSON-список отдается из готового снимка каталога.
+        """
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(name))
+        if request.accepted_renderer.format == 'json':
+            return snapshot_response(
+                catalog_snapshots['ingredients'].get(), request
+            )
+        return super().list(request, *args, **kwargs)
@@ -1,8 +1,6 @@
-import base64
-
 from admin_auto_filters.filters import AutocompleteFilter
 from django.contrib import admin
-from django.utils.html import mark_safe
+from django.utils.html import format_html
 
 from cooking.models import (
     Favorite,
@@ -12,6 +10,9 @@ from cooking.models import (
     ShoppingCart,
     Tag
 )
+from utils.images import get_current_variants, get_derivative_urls
+from utils.recipe_cache import reset_recipes
+from utils.shopping_list import reset_shopping_lists
 
 
 class AuthorFilter(AutocompleteFilter):
@@ -91,15 +92,23 @@ class RecipeAdmin(admin.ModelAdmin):
         ),
     )
 
+    def save_related(self, request, form, formsets, change):
+        """Сбрасывает кеши рецепта после правки его ингредиентов."""
+        super().save_related(request, form, formsets, change)
+        if change:
+            reset_shopping_lists(form.instance.pk)
+            reset_recipes((form.instance.pk,))
+
     def display_image(self, obj):
-        """Отображает изображение рецепта в админке."""
-        optimized_image = obj.get_optimized_image()
-        optimized_image.seek(0)
-        img_data = base64.b64encode(optimized_image.read()).decode()
-
-        return mark_safe(
-            f'<img src="data:image/jpeg;base64,{img_data}" '
-            f'style="width: 150px; height: 150px;" />'
+        """Отображает уменьшенную копию изображения рецепта в админке."""
+        variants = get_derivative_urls(
+            get_current_variants(obj.image_variants, obj.image)
+        )
+        url = variants.get('small', {}).get('jpeg') or obj.image.url
+        return format_html(
+            '<img src="{}" style="width: 150px; height: 150px; '
+            'object-fit: cover;" />',
+            url,
         )
 
     display_image.short_description = 'Image'
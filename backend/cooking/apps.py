@@ -5,3 +5,7 @@ class CookingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cooking'
     verbose_name = 'Готовка'
+
+    def ready(self):
+        import cooking.signals  # noqa: F401
+        import utils.checks  # noqa: F401
@@ -0,0 +1,496 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import django
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import URLResolver, get_resolver, resolve
+from django.utils.encoding import iri_to_uri
+from rest_framework.authtoken.models import Token
+
+from account.models import Follow, User
+from cooking.models import (
+    Favorite,
+    FeedEntry,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from utils.benchmark import (
+    BENCHMARK_PASSWORD,
+    BENCHMARK_PREFIX,
+    add_database_argument,
+    check_database,
+)
+
+PNG_DATA_URI = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+
+SIGNUP_PREFIX = f'{BENCHMARK_PREFIX}signup_'
+RECIPE_NAME = 'Рецепт бенчмарка'
+
+
+def percentile(timings, share):
+    """Перцентиль по отсортированному списку, метод ближайшего ранга."""
+    return timings[max(0, round(len(timings) * share) - 1)]
+
+
+def get_api_routes():
+    """Все маршруты api/urls.py, кроме вариантов с суффиксом формата.
+
+    Маршруты склеиваются так же, как в ResolverMatch.route, чтобы их
+    можно было сравнить с маршрутами выполненных запросов.
+    """
+    routes = set()
+
+    def walk(patterns, prefix):
+        for pattern in patterns:
+            route = prefix + str(pattern.pattern).removeprefix('^')
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns, route)
+            elif 'format>' not in route:
+                routes.add(route)
+
+    for pattern in get_resolver().url_patterns:
+        if isinstance(pattern, URLResolver) and str(pattern.pattern) == 'api/':
+            walk(pattern.url_patterns, 'api/')
+    return routes
+
+
+def recipe_body(context):
+    """Тело запроса на создание и изменение рецепта."""
+    return {
+        'name': RECIPE_NAME,
+        'text': 'Рецепт, созданный бенчмарком.',
+        'cooking_time': 10,
+        'image': PNG_DATA_URI,
+        'tags': context['tag_ids'],
+        'ingredients': [
+            {'id': pk, 'amount': 10} for pk in context['ingredient_ids']
+        ],
+    }
+
+
+STEPS = (
+    ('api root', 'get', '/api/', None),
+    ('tags list', 'get', '/api/tags/', None),
+    ('tag detail', 'get', '/api/tags/{tag_id}/', None),
+    ('ingredients list', 'get', '/api/ingredients/', None),
+    ('ingredients search', 'get', '/api/ingredients/?name=мол', None),
+    ('ingredient detail', 'get', '/api/ingredients/{ingredient_id}/', None),
+    ('recipes list', 'get', '/api/recipes/', None),
+    ('recipes anonymous', 'anon', '/api/recipes/', None),
+    ('recipes page 100', 'get', '/api/recipes/?page=100', None),
+    ('recipes by tags', 'get', '/api/recipes/?tags={tag_slug}', None),
+    ('recipes by author', 'get', '/api/recipes/?author={author_id}', None),
+    ('recipes favorited', 'get', '/api/recipes/?is_favorited=1', None),
+    (
+        'recipes in cart',
+        'get',
+        '/api/recipes/?is_in_shopping_cart=1',
+        None,
+    ),
+    ('recipes search', 'get', '/api/recipes/?search=курица', None),
+    ('recipes feed', 'get', '/api/recipes/feed/', None),
+    ('recipe detail', 'get', '/api/recipes/{recipe_id}/', None),
+    ('recipe get-link', 'get', '/api/recipes/{recipe_id}/get-link/', None),
+    (
+        'download shopping cart',
+        'get',
+        '/api/recipes/download_shopping_cart/',
+        None,
+    ),
+    ('users list', 'get', '/api/users/', None),
+    ('user detail', 'get', '/api/users/{author_id}/', None),
+    ('users me', 'get', '/api/users/me/', None),
+    ('subscriptions', 'get', '/api/users/subscriptions/', None),
+    (
+        'subscriptions limit 3',
+        'get',
+        '/api/users/subscriptions/?recipes_limit=3',
+        None,
+    ),
+    ('recipe create', 'post', '/api/recipes/', recipe_body),
+    ('recipe update', 'patch', '/api/recipes/{created_id}/', recipe_body),
+    ('recipe delete', 'delete', '/api/recipes/{created_id}/', None),
+    ('favorite add', 'post', '/api/recipes/{free_recipe_id}/favorite/', None),
+    (
+        'favorite remove',
+        'delete',
+        '/api/recipes/{free_recipe_id}/favorite/',
+        None,
+    ),
+    (
+        'cart add',
+        'post',
+        '/api/recipes/{free_recipe_id}/shopping_cart/',
+        None,
+    ),
+    (
+        'cart remove',
+        'delete',
+        '/api/recipes/{free_recipe_id}/shopping_cart/',
+        None,
+    ),
+    (
+        'favorite bulk add',
+        'post',
+        '/api/recipes/favorite/',
+        lambda context: {'recipes': [context['free_recipe_id']]},
+    ),
+    (
+        'favorite bulk remove',
+        'delete',
+        '/api/recipes/favorite/',
+        lambda context: {'recipes': [context['free_recipe_id']]},
+    ),
+    (
+        'cart bulk add',
+        'post',
+        '/api/recipes/shopping_cart/',
+        lambda context: {'recipes': [context['free_recipe_id']]},
+    ),
+    (
+        'cart bulk remove',
+        'delete',
+        '/api/recipes/shopping_cart/',
+        lambda context: {'recipes': [context['free_recipe_id']]},
+    ),
+    ('subscribe', 'post', '/api/users/{free_author_id}/subscribe/', None),
+    (
+        'unsubscribe',
+        'delete',
+        '/api/users/{free_author_id}/subscribe/',
+        None,
+    ),
+    (
+        'avatar put',
+        'put',
+        '/api/users/me/avatar/',
+        lambda context: {'avatar': PNG_DATA_URI},
+    ),
+    ('avatar delete', 'delete', '/api/users/me/avatar/', None),
+    (
+        'signup',
+        'anon_post',
+        '/api/users/',
+        lambda context: {
+            'email': f'{SIGNUP_PREFIX}{context["iteration"]}@example.com',
+            'username': f'{SIGNUP_PREFIX}{context["iteration"]}',
+            'first_name': 'Имя',
+            'last_name': 'Фамилия',
+            'password': BENCHMARK_PASSWORD,
+        },
+    ),
+    (
+        'token login',
+        'anon_post',
+        '/api/auth/token/login/',
+        lambda context: {
+            'email': context['login_email'],
+            'password': BENCHMARK_PASSWORD,
+        },
+    ),
+    ('token logout', 'logout', '/api/auth/token/logout/', None),
+    (
+        'set password',
+        'post',
+        '/api/users/set_password/',
+        lambda context: {
+            'current_password': BENCHMARK_PASSWORD,
+            'new_password': BENCHMARK_PASSWORD,
+        },
+    ),
+)
+"""Шаги бенчмарка: имя, метод, шаблон пути, функция тела запроса.
+
+Шаги выполняются по порядку на каждой итерации, поэтому запросы на
+запись идут парами (добавление и удаление) и оставляют данные в
+исходном состоянии. Метод `anon` — GET без токена, `anon_post` —
+POST без токена, `logout` — выход с токеном, полученным при входе.
+"""
+
+
+class Command(BaseCommand):
+    """Бенчмарк всех эндпоинтов API на синтетическом наборе данных."""
+
+    help = (
+        'Выполняет все эндпоинты api/urls.py тестовым клиентом Django и '
+        'сохраняет p50/p95 времени ответа и число SQL-запросов в JSON. '
+        'Данные создаются командой seed_benchmark.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--output',
+            default='benchmark.json',
+            help='Файл для результатов в формате JSON.',
+        )
+        parser.add_argument(
+            '--compare',
+            help='Файл с результатами прошлого запуска для сравнения.',
+        )
+        parser.add_argument(
+            '--only',
+            help='Выполнить только шаги, в названии которых есть строка.',
+        )
+        add_database_argument(parser)
+
+    def handle(self, *args, **options):
+        """Функция обработчик."""
+        check_database(options)
+        if options['repeat'] < 1:
+            raise CommandError('--repeat должен быть положительным.')
+        users = User.objects.filter(
+            username__startswith=BENCHMARK_PREFIX
+        ).exclude(username__startswith=SIGNUP_PREFIX)
+        viewer = (
+            users.filter(shopping_carts__isnull=False, following__isnull=False)
+            .order_by('id')
+            .first()
+        )
+        if viewer is None:
+            raise CommandError('Сначала выполните seed_benchmark.')
+
+        setup_test_environment()
+        context = self.get_context(viewer, users)
+        token, _ = Token.objects.get_or_create(user=viewer)
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        steps = [
+            step
+            for step in STEPS
+            if not options['only'] or options['only'] in step[0]
+        ]
+
+        results = {}
+        covered = set()
+        try:
+            for iteration in range(options['repeat'] + 1):
+                context['iteration'] = iteration
+                for step in steps:
+                    self.run_step(
+                        client, step, context, results, covered,
+                        measure_queries=iteration == 0,
+                    )
+        finally:
+            self.cleanup(viewer)
+
+        report = self.build_report(results, options['repeat'])
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        self.print_report(report, options['compare'])
+
+        if not options['only']:
+            missing = get_api_routes() - covered
+            if missing:
+                self.stdout.write(
+                    self.style.WARNING(
+                        'Не покрыты маршруты: ' + ', '.join(sorted(missing))
+                    )
+                )
+        self.stdout.write(f'Результаты сохранены в {options["output"]}')
+
+    def get_context(self, viewer, users):
+        """Подбирает id для шаблонов путей из синтетических данных."""
+        recipes = Recipe.objects.filter(author__in=users)
+        author_id = (
+            recipes.exclude(author=viewer)
+            .order_by('id')
+            .values_list('author_id', flat=True)
+            .first()
+        )
+        followed = Follow.objects.filter(user=viewer).values('following_id')
+        free_recipe_id = (
+            recipes.exclude(favorites__user=viewer)
+            .exclude(shopping_carts__user=viewer)
+            .order_by('id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        free_author_id = (
+            users.exclude(pk=viewer.pk)
+            .exclude(pk__in=followed)
+            .order_by('id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        login_user = users.exclude(pk=viewer.pk).order_by('-id').first()
+        tag = Tag.objects.order_by('id').first()
+        return {
+            'tag_id': tag.pk,
+            'tag_slug': tag.slug,
+            'tag_ids': [tag.pk],
+            'ingredient_id': Ingredient.objects.order_by('id').first().pk,
+            'ingredient_ids': list(
+                RecipeIngredient.objects.filter(
+                    recipe__in=recipes.order_by('id')[:1]
+                ).values_list('ingredient_id', flat=True)
+            ),
+            'author_id': author_id,
+            'recipe_id': recipes.order_by('id').first().pk,
+            'free_recipe_id': free_recipe_id,
+            'free_author_id': free_author_id,
+            'login_email': login_user.email,
+        }
+
+    def run_step(
+        self, client, step, context, results, covered, measure_queries
+    ):
+        name, method, path, body = step
+        path = iri_to_uri(path.format(**context))
+        data = json.dumps(body(context)) if body else None
+        request = self.get_request(client, method, context)
+
+        queries = None
+        started = time.perf_counter()
+        if measure_queries:
+            with CaptureQueriesContext(connection) as captured:
+                response = request(path, data)
+            queries = captured.captured_queries
+        else:
+            response = request(path, data)
+        elapsed = (time.perf_counter() - started) * 1000
+        content = (
+            b''.join(response.streaming_content)
+            if response.streaming
+            else response.content
+        )
+
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{name}: {method.upper()} {path} -> '
+                f'{response.status_code} {content[:500]!r}'
+            )
+        if name == 'recipe create':
+            context['created_id'] = response.json()['id']
+        elif name == 'token login':
+            context['login_token'] = response.json()['auth_token']
+
+        result = results.setdefault(
+            name,
+            {
+                'name': name,
+                'method': method,
+                'path': step[2],
+                'route': resolve(path.split('?')[0]).route,
+                'timings': [],
+            },
+        )
+        if queries is not None:
+            result['queries'] = len(queries)
+            result['sql_ms'] = round(
+                sum(float(query['time']) for query in queries) * 1000, 2
+            )
+        else:
+            result['timings'].append(elapsed)
+        result['status'] = response.status_code
+        result['bytes'] = len(content)
+        covered.add(result['route'])
+
+    def get_request(self, client, method, context):
+        def send(path, data, method=method, client=client):
+            if method == 'anon':
+                return Client().get(path)
+            if method == 'anon_post':
+                return Client().post(
+                    path, data, content_type='application/json'
+                )
+            if method == 'logout':
+                return Client(
+                    HTTP_AUTHORIZATION=f'Token {context["login_token"]}'
+                ).post(path)
+            if method == 'get':
+                return client.get(path)
+            return getattr(client, method)(
+                path, data, content_type='application/json'
+            )
+
+        return send
+
+    def cleanup(self, viewer):
+        """Удаляет данные, созданные бенчмарком."""
+        User.objects.filter(username__startswith=SIGNUP_PREFIX).delete()
+        Recipe.objects.filter(author=viewer, name=RECIPE_NAME).delete()
+
+    def build_report(self, results, repeat):
+        endpoints = []
+        for result in results.values():
+            timings = sorted(result.pop('timings'))
+            endpoints.append(
+                {
+                    **result,
+                    'p50_ms': round(statistics.median(timings), 2),
+                    'p95_ms': round(percentile(timings, 0.95), 2),
+                    'mean_ms': round(statistics.fmean(timings), 2),
+                    'max_ms': round(timings[-1], 2),
+                }
+            )
+        return {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'commit': self.get_commit(),
+                'repeat': repeat,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'dataset': {
+                    'users': User.objects.count(),
+                    'recipes': Recipe.objects.count(),
+                    'recipe_ingredients': RecipeIngredient.objects.count(),
+                    'favorites': Favorite.objects.count(),
+                    'shopping_carts': ShoppingCart.objects.count(),
+                    'follows': Follow.objects.count(),
+                    'feed_entries': FeedEntry.objects.count(),
+                },
+            },
+            'endpoints': endpoints,
+        }
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ('git', 'rev-parse', '--short', 'HEAD'),
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def print_report(self, report, compare):
+        previous = {}
+        if compare:
+            with open(compare, encoding='utf-8') as source:
+                previous = {
+                    item['name']: item
+                    for item in json.load(source)['endpoints']
+                }
+        for item in report['endpoints']:
+            line = (
+                f'{item["name"]:<26} p50={item["p50_ms"]:>8.1f} мс '
+                f'p95={item["p95_ms"]:>8.1f} мс '
+                f'SQL={item["queries"]:>3}'
+            )
+            old = previous.get(item['name'])
+            if old:
+                if old['p50_ms']:
+                    change = (item['p50_ms'] / old['p50_ms'] - 1) * 100
+                    change = f'{change:+.0f}%'
+                else:
+                    change = f'{item["p50_ms"] - old["p50_ms"]:+.1f} мс'
+                line += (
+                    f'  p50 {change} '
+                    f'SQL {item["queries"] - old["queries"]:+d}'
+                )
+            self.stdout.write(line)
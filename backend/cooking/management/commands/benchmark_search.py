@@ -0,0 +1,176 @@
+import statistics
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.http import QueryDict
+from django.test import Client
+from django.test.utils import setup_test_environment
+
+from account.models import User
+from cooking.models import Ingredient, Recipe, Tag
+from utils.benchmark import WORDS, add_database_argument, check_database
+from utils.constants import PAGE_SIZE
+from utils.filters import RecipeFilter
+
+BENCHMARK_USERNAME = 'search_benchmark'
+
+QUERIES = ('борщ', 'курица с грибами', 'домашний пирог с яблоками')
+
+INSERT_RECIPES_SQL = '''
+WITH words AS (SELECT %(words)s::text[] AS vocabulary)
+INSERT INTO cooking_recipe (
+    name, text, author_id, image, image_variants, cooking_time, pub_date
+)
+SELECT
+    (SELECT string_agg(vocabulary[1 + floor(%(pick)s)::int], ' ')
+     FROM words, generate_series(1, 2 + g %% 3)),
+    (SELECT string_agg(vocabulary[1 + floor(%(pick)s)::int], ' ')
+     FROM words, generate_series(1, 20 + g %% 20)),
+    %(author)s,
+    'recipes/images/benchmark.png',
+    '{}',
+    1 + g %% 120,
+    now() - make_interval(secs => g)
+FROM generate_series(1, %(count)s) AS g
+'''
+
+PICK_WORD_SQL = 'power(random(), 1.5) * %(size)s'
+"""Смещенный выбор слова: первые слова словаря встречаются чаще."""
+
+INSERT_TAGS_SQL = '''
+INSERT INTO cooking_recipe_tags (recipe_id, tag_id)
+SELECT id, (%(tags)s::bigint[])[1 + id %% %(size)s]
+FROM cooking_recipe WHERE author_id = %(author)s
+'''
+
+DELETE_SQL = (
+    'DELETE FROM cooking_recipe_tags WHERE recipe_id IN '
+    '(SELECT id FROM cooking_recipe WHERE author_id = %(author)s)',
+    'DELETE FROM cooking_recipe WHERE author_id = %(author)s',
+)
+
+
+class Command(BaseCommand):
+    """Бенчмарк полнотекстового поиска рецептов на синтетических данных."""
+
+    help = (
+        'Заполняет БД синтетическими рецептами и замеряет время '
+        'запросов /api/recipes/?search=.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1_000_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Не удалять синтетические рецепты после замеров.',
+        )
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            help='Вывести план запроса для каждого поискового запроса.',
+        )
+        add_database_argument(parser)
+
+    def handle(self, *args, **options):
+        """Функция обработчик."""
+        check_database(options)
+        if options['repeat'] < 1:
+            raise CommandError('--repeat должен быть положительным.')
+        author, created = User.objects.get_or_create(
+            username=BENCHMARK_USERNAME,
+            defaults={
+                'email': f'{BENCHMARK_USERNAME}@example.com',
+                'first_name': 'Benchmark',
+                'last_name': 'Benchmark',
+            },
+        )
+        if created or not author.recipes.exists():
+            self.seed(author, options['recipes'])
+
+        setup_test_environment()
+        client = Client()
+        tag = Tag.objects.first()
+        try:
+            for query in QUERIES:
+                self.measure(client, {'search': query}, options)
+                if tag is not None:
+                    params = {
+                        'search': query,
+                        'tags': tag.slug,
+                        'author': author.pk,
+                    }
+                    self.measure(client, params, options)
+        finally:
+            if not options['keep']:
+                self.cleanup(author)
+
+    def seed(self, author, count):
+        self.stdout.write(f'Создание {count} синтетических рецептов...')
+        started = time.perf_counter()
+        tags = list(Tag.objects.values_list('id', flat=True))
+        words = self.get_vocabulary()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                INSERT_RECIPES_SQL.replace('%(pick)s', PICK_WORD_SQL),
+                {
+                    'words': words,
+                    'size': len(words),
+                    'author': author.pk,
+                    'count': count,
+                },
+            )
+            if tags:
+                cursor.execute(
+                    INSERT_TAGS_SQL,
+                    {'tags': tags, 'size': len(tags), 'author': author.pk},
+                )
+            cursor.execute('ANALYZE cooking_recipe, cooking_recipe_tags')
+        self.stdout.write(
+            f'Готово за {time.perf_counter() - started:.1f} с.'
+        )
+
+    def get_vocabulary(self):
+        """Словарь: частые кулинарные слова и слова из каталога."""
+        words = list(WORDS)
+        known = set(words)
+        for name in Ingredient.objects.values_list('name', flat=True):
+            for word in name.lower().split():
+                if word.isalpha() and word not in known:
+                    known.add(word)
+                    words.append(word)
+        return words
+
+    def measure(self, client, params, options):
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            response = client.get('/api/recipes/', params)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        self.stdout.write(
+            f'{params}: status={response.status_code} '
+            f'count={response.json().get("count")} '
+            f'p50={statistics.median(timings):.1f} мс p95={p95:.1f} мс'
+        )
+        if options['explain']:
+            self.explain(params)
+
+    def explain(self, params):
+        data = QueryDict(mutable=True)
+        data.update(params)
+        queryset = RecipeFilter(data, queryset=Recipe.objects.all()).qs
+        self.stdout.write(
+            queryset.order_by('-search_rank', '-id')[:PAGE_SIZE].explain(
+                analyze=True
+            )
+        )
+
+    def cleanup(self, author):
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in DELETE_SQL:
+                cursor.execute(sql, {'author': author.pk})
+        author.delete()
@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+
+from django.core.management import BaseCommand, CommandError
+
+from cooking.models import Recipe
+from utils.constants import RECIPE_EXPORT_CHUNK_SIZE
+from utils.recipe_archive import (
+    IMAGES_DIR,
+    MANIFEST_FILE,
+    RECIPES_FILE,
+    open_manifest,
+    serialize_recipe,
+    truncate_partial_line,
+    write_json_file,
+)
+
+
+class Command(BaseCommand):
+    """Выгрузка рецептов в архив для переноса между окружениями.
+
+    Архив — каталог с recipes.jsonl, изображениями в images/ и
+    manifest.json. Рецепты читаются по возрастанию id через iterator,
+    поэтому память не зависит от их числа. Повторный запуск дописывает
+    архив с рецепта, следующего за последним выгруженным.
+    """
+
+    help = 'Выгружает рецепты с изображениями в архив JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог архива.')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=RECIPE_EXPORT_CHUNK_SIZE,
+            help='Количество рецептов, читаемых из БД за раз.',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Начать выгрузку заново вместо продолжения.',
+        )
+
+    def handle(self, *args, **options):
+        """Функция обработчик."""
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть положительным.')
+        directory = options['directory']
+        os.makedirs(os.path.join(directory, IMAGES_DIR), exist_ok=True)
+        manifest = open_manifest(directory, options['restart'])
+        manifest['completed'] = False
+        write_json_file(os.path.join(directory, MANIFEST_FILE), manifest)
+
+        path = os.path.join(directory, RECIPES_FILE)
+        last_id = 0
+        if options['restart'] or not os.path.exists(path):
+            open(path, 'w').close()
+        else:
+            last_line = truncate_partial_line(path)
+            if last_line:
+                last_id = json.loads(last_line)['id']
+                self.stdout.write(f'Продолжение после рецепта {last_id}')
+
+        queryset = (
+            Recipe.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .select_related('author')
+            .prefetch_related('tags', 'recipe_ingredients__ingredient')
+        )
+        exported = skipped = 0
+        with open(path, 'a', encoding='utf-8') as file:
+            for recipe in queryset.iterator(chunk_size=options['chunk_size']):
+                image = self.copy_image(recipe, directory)
+                if image is None:
+                    skipped += 1
+                    continue
+                file.write(
+                    json.dumps(
+                        serialize_recipe(recipe, image), ensure_ascii=False
+                    )
+                    + '\n'
+                )
+                exported += 1
+                if exported % options['chunk_size'] == 0:
+                    file.flush()
+                    self.stdout.write(f'Выгружено рецептов: {exported}')
+
+        manifest['completed'] = True
+        write_json_file(os.path.join(directory, MANIFEST_FILE), manifest)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Выгружено рецептов: {exported}, пропущено: {skipped}'
+            )
+        )
+
+    def copy_image(self, recipe, directory):
+        """Копирует изображение рецепта в архив и возвращает его путь.
+
+        Файл пишется во временный и переименовывается, чтобы после
+        прерывания в архиве не осталось обрезанных изображений.
+        """
+        _, extension = os.path.splitext(recipe.image.name)
+        name = f'{IMAGES_DIR}/{recipe.pk}{extension.lower()}'
+        target = os.path.join(directory, name)
+        try:
+            with recipe.image.open('rb') as source, open(
+                f'{target}.tmp', 'wb'
+            ) as copy:
+                shutil.copyfileobj(source, copy)
+        except (OSError, ValueError) as error:
+            self.stderr.write(
+                f'Рецепт {recipe.pk} пропущен: нет изображения ({error})'
+            )
+            return None
+        os.replace(f'{target}.tmp', target)
+        return name
@@ -0,0 +1,52 @@
+from django.core.management import BaseCommand
+
+from account.models import User
+from cooking.models import Recipe
+from utils.constants import AVATAR_IMAGE_SIZES, RECIPE_IMAGE_SIZES
+from utils.images import sync_derivatives
+from utils.recipe_cache import reset_author_recipes, reset_recipes
+
+IMAGE_FIELDS = (
+    (Recipe, 'image', 'image_variants', RECIPE_IMAGE_SIZES),
+    (User, 'avatar', 'avatar_variants', AVATAR_IMAGE_SIZES),
+)
+
+
+class Command(BaseCommand):
+    """Строит копии изображений, загруженных до появления копий."""
+
+    help = (
+        'Создает уменьшенные копии изображений рецептов и аватаров, '
+        'для которых они еще не построены.'
+    )
+
+    def handle(self, *args, **options):
+        """Функция обработчик."""
+        for model, field_name, variants_name, sizes in IMAGE_FIELDS:
+            queryset = (
+                model.objects.exclude(**{f'{field_name}__isnull': True})
+                .exclude(**{field_name: ''})
+                .only('pk', field_name, variants_name)
+            )
+            updated = []
+            for instance in queryset.iterator():
+                try:
+                    if sync_derivatives(
+                        instance, field_name, variants_name, sizes
+                    ):
+                        updated.append(instance.pk)
+                except OSError as error:
+                    self.stdout.write(
+                        self.style.WARNING(f'{instance.pk}: {error}')
+                    )
+            if model is Recipe:
+                reset_recipes(updated)
+            else:
+                for author_id in updated:
+                    reset_author_recipes(author_id)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'{model._meta.verbose_name_plural}: '
+                    f'обновлено {len(updated)}'
+                )
+            )
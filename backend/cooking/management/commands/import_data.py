@@ -1,43 +1,142 @@
 import csv
+import os
 
-from django.core.management import BaseCommand
-from django.db import IntegrityError
+from django.core.exceptions import ValidationError
+from django.core.management import BaseCommand, CommandError
 
 from foodgram import settings
-from cooking.models import Ingredient, Tag
+from utils.catalog_import import CATALOGS, READERS, detect_format
+from utils.constants import IMPORT_BATCH_SIZE
+from utils.versions import bump_version
 
-MODELS_FILES = {
-    Ingredient: 'ingredients.csv',
-    Tag: 'tags.csv',
-}
+DEFAULT_FILES = ('ingredients.csv', 'tags.csv')
+"""Файлы каталогов из каталога data, загружаемые по умолчанию."""
 
 
 class Command(BaseCommand):
-    """Класс для автоматического импорта данных."""
+    """Потоковая загрузка каталогов ингредиентов и тегов.
+
+    Файлы CSV, JSON и JSON Lines читаются построчно и загружаются
+    пакетами через INSERT ... ON CONFLICT: новые записи добавляются,
+    существующие обновляются, только если изменились. Повторный запуск
+    безопасен, а память не зависит от размера файла.
+
+    Команда только сбрасывает версию измененного каталога в общем кеше
+    (см. utils.checks), а новый снимок сервер строит при первом запросе,
+    поэтому весь каталог в памяти команды не собирается. С кешем в
+    памяти процесса команда не запустится: системная проверка
+    foodgram.E001 остановит ее.
+    """
+
+    help = 'Загружает ингредиенты и теги из CSV, JSON или JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files',
+            nargs='*',
+            help=(
+                'Файлы каталогов. По умолчанию — data/ingredients.csv и '
+                'data/tags.csv.'
+            ),
+        )
+        parser.add_argument(
+            '--catalog',
+            choices=sorted(CATALOGS),
+            help='Каталог; по умолчанию определяется по имени файла.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=sorted(READERS),
+            help='Формат файлов; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Количество строк в одном запросе.',
+        )
 
     def handle(self, *args, **options):
         """Функция обработчик."""
-        for model, file in MODELS_FILES.items():
-            with open(
-                f'{settings.BASE_DIR}/data/{file}',
-                'r',
-                encoding='utf-8',
-            ) as table:
-                reader = csv.DictReader(table)
-                instances = []
-
-                for data in reader:
-                    instances.append(model(**data))
-
-                try:
-                    model.objects.bulk_create(instances)
-                except IntegrityError:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'Некоторые записи для {model.__name__} есть в бд.'
+        self.verbosity = options['verbosity']
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        files = options['files'] or [
+            os.path.join(settings.BASE_DIR, 'data', name)
+            for name in DEFAULT_FILES
+        ]
+        changed = set()
+        for path in files:
+            catalog = options['catalog'] or self.detect_catalog(path)
+            file_format = options['format'] or detect_format(path)
+            if file_format is None:
+                raise CommandError(
+                    f'Не удалось определить формат файла {path}, '
+                    'укажите --format.'
+                )
+            if self.import_file(
+                path, catalog, file_format, options['batch_size']
+            ):
+                changed.add(catalog)
+
+        for catalog in sorted(changed):
+            bump_version(CATALOGS[catalog].version_name)
+            self.stdout.write(f'Каталог {catalog} изменен.')
+        self.stdout.write(self.style.SUCCESS('Ингредиенты и теги загружены'))
+
+    def detect_catalog(self, path):
+        """Определяет каталог по имени файла, например tags.jsonl."""
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name not in CATALOGS:
+            raise CommandError(
+                f'Не удалось определить каталог файла {path}, '
+                'укажите --catalog.'
+            )
+        return name
+
+    def import_file(self, path, catalog, file_format, batch_size):
+        """Загружает один файл и возвращает, изменился ли каталог."""
+        upsert = CATALOGS[catalog]
+        read = inserted = updated = skipped = 0
+        batch = []
+
+        def flush():
+            nonlocal inserted, updated
+            added, changed = upsert.upsert(batch)
+            inserted += added
+            updated += changed
+            batch.clear()
+            if self.verbosity:
+                self.stdout.write(
+                    f'{catalog}: прочитано {read}, добавлено {inserted}, '
+                    f'обновлено {updated}'
+                )
+
+        newline = '' if file_format == 'csv' else None
+        try:
+            with open(path, encoding='utf-8', newline=newline) as file:
+                for number, row in enumerate(READERS[file_format](file), 1):
+                    read += 1
+                    try:
+                        batch.append(upsert.clean(row))
+                    except ValidationError as error:
+                        skipped += 1
+                        self.stderr.write(
+                            f'{path}: запись {number} пропущена: '
+                            f'{"; ".join(error.messages)}'
                         )
-                    )
+                        continue
+                    if len(batch) >= batch_size:
+                        flush()
+        except (OSError, ValueError, csv.Error) as error:
+            raise CommandError(f'Ошибка чтения {path}: {error}')
+        if batch:
+            flush()
 
+        unchanged = read - skipped - inserted - updated
         self.stdout.write(
-            self.style.SUCCESS('Ингредиенты и теги загружены')
+            f'{path} ({catalog}): прочитано {read}, добавлено {inserted}, '
+            f'обновлено {updated}, без изменений {unchanged}, '
+            f'пропущено {skipped}'
         )
+        return bool(inserted or updated)
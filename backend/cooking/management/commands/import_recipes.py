@@ -0,0 +1,381 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from cooking.models import Recipe, RecipeIngredient, Tag
+from utils.catalog_import import CATALOGS
+from utils.conditional import RECIPES_VERSION, USERS_VERSION
+from utils.constants import RECIPE_IMAGE_SIZES, RECIPE_IMPORT_BATCH_SIZE
+from utils.feed import fan_out_recipes
+from utils.images import save_derivatives
+from utils.recipe_archive import (
+    MANIFEST_FILE,
+    RECIPES_FILE,
+    read_json_file,
+    render_image_file,
+    write_json_file,
+)
+from utils.versions import bump_version
+
+User = get_user_model()
+
+STATE_FILE = 'import_state.json'
+"""Файл архива с числом загруженных строк для каждой БД."""
+
+IMAGE_PREFIX = 'recipes/images/'
+"""Каталог изображений рецептов в хранилище, как upload_to модели."""
+
+SET_PUB_DATE_SQL = '''
+UPDATE cooking_recipe
+SET pub_date = coalesce(data.pub_date, cooking_recipe.pub_date)
+FROM unnest(%s::bigint[], %s::timestamptz[]) AS data (id, pub_date)
+WHERE cooking_recipe.id = data.id
+'''
+"""pub_date заполняется автоматически, поэтому дата из архива ставится
+отдельным запросом."""
+
+
+class Command(BaseCommand):
+    """Загрузка архива рецептов, выгруженного командой export_recipes.
+
+    Рецепты загружаются пакетами: теги, ингредиенты и авторы пакета
+    ищутся несколькими запросами IN, недостающие добавляются, а рецепты,
+    их ингредиенты и теги вставляются через bulk_create в одной
+    транзакции. Копии изображений строятся в пуле процессов.
+
+    После каждого пакета число загруженных строк записывается в
+    import_state.json архива, и повторный запуск продолжает с этого
+    места. Пакет, записанный в БД перед самым сбоем, распознается по
+    именам изображений и повторно не загружается; с --restart так
+    проверяется каждый пакет.
+    """
+
+    help = 'Загружает рецепты с изображениями из архива JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог архива.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RECIPE_IMPORT_BATCH_SIZE,
+            help='Количество рецептов в одной транзакции.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Количество процессов для обработки изображений.',
+        )
+        parser.add_argument(
+            '--author',
+            help='Email пользователя, которому назначить все рецепты. '
+            'По умолчанию авторы ищутся по email и создаются, если их нет.',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Пройти архив с начала, пропуская уже загруженные рецепты.',
+        )
+
+    def handle(self, *args, **options):
+        """Функция обработчик."""
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError(
+                '--batch-size и --workers должны быть положительными.'
+            )
+        self.directory = os.path.realpath(options['directory'])
+        manifest = read_json_file(os.path.join(self.directory, MANIFEST_FILE))
+        if manifest is None:
+            raise CommandError(f'В {self.directory} нет {MANIFEST_FILE}.')
+        if not manifest.get('completed'):
+            self.stderr.write(
+                'Выгрузка архива не завершена, загружаются '
+                'только выгруженные рецепты.'
+            )
+        self.archive = manifest['archive']
+        self.default_author = None
+        if options['author']:
+            self.default_author = User.objects.filter(
+                email=options['author']
+            ).first()
+            if self.default_author is None:
+                raise CommandError(
+                    f'Пользователь {options["author"]} не найден.'
+                )
+
+        state_path = os.path.join(self.directory, STATE_FILE)
+        state = read_json_file(state_path, {})
+        database = '{HOST}:{PORT}/{NAME}'.format(**connection.settings_dict)
+        done = 0 if options['restart'] else state.get(database, 0)
+        if done:
+            self.stdout.write(f'Продолжение после строки {done}')
+
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+        self.ingredients = {}
+        self.authors = {}
+        self.created = {'tags': 0, 'ingredients': 0, 'authors': 0}
+        imported = skipped = 0
+        with ProcessPoolExecutor(
+            options['workers'], mp_context=multiprocessing.get_context('spawn')
+        ) as pool, open(
+            os.path.join(self.directory, RECIPES_FILE), encoding='utf-8'
+        ) as file:
+            lines = islice(enumerate(file, 1), done, None)
+            # Первый пакет проверяется всегда: сбой мог случиться после
+            # его записи в БД, но до первого сохранения состояния.
+            check_existing = True
+            while batch := list(islice(lines, options['batch_size'])):
+                added, failed = self.import_batch(batch, pool, check_existing)
+                check_existing = options['restart']
+                imported += added
+                skipped += failed
+                state[database] = batch[-1][0]
+                write_json_file(state_path, state)
+                self.stdout.write(
+                    f'Строк: {batch[-1][0]}, загружено рецептов: {imported}'
+                )
+
+        if self.created['tags']:
+            bump_version(CATALOGS['tags'].version_name)
+        if self.created['ingredients']:
+            bump_version(CATALOGS['ingredients'].version_name)
+        if self.created['authors']:
+            bump_version(USERS_VERSION)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Загружено рецептов: {imported}, пропущено: {skipped}; '
+                f'создано тегов: {self.created["tags"]}, ингредиентов: '
+                f'{self.created["ingredients"]}, авторов: '
+                f'{self.created["authors"]}'
+            )
+        )
+
+    def import_batch(self, batch, pool, check_existing):
+        """Загружает пакет строк архива и возвращает (загружено, пропущено)."""
+        records = []
+        for number, line in batch:
+            try:
+                records.append(self.clean(json.loads(line), number))
+            except (ValueError, KeyError, TypeError, ValidationError) as error:
+                self.warn(number, error)
+        skipped = len(batch) - len(records)
+        if check_existing:
+            existing = set(
+                Recipe.objects.filter(
+                    image__in=[record['storage_name'] for record in records]
+                ).values_list('image', flat=True)
+            )
+            records = [
+                record
+                for record in records
+                if record['storage_name'] not in existing
+            ]
+
+        self.resolve_catalogs(records)
+        self.resolve_authors(records)
+        rendered = pool.map(
+            render_image_file,
+            [record['image_path'] for record in records],
+            repeat(RECIPE_IMAGE_SIZES),
+        )
+        recipes, items = [], []
+        for record, (variants, error) in zip(records, rendered):
+            author_id = self.get_author_id(record)
+            if error or author_id is None:
+                skipped += 1
+                self.warn(
+                    record['number'], error or 'не удалось создать автора'
+                )
+                continue
+            recipes.append(self.build_recipe(record, author_id, variants))
+            items.append(record)
+
+        with transaction.atomic():
+            Recipe.objects.bulk_create(recipes)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    SET_PUB_DATE_SQL,
+                    (
+                        [recipe.pk for recipe in recipes],
+                        [record['pub_date'] for record in items],
+                    ),
+                )
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient_id=self.ingredients[key],
+                    amount=amount,
+                )
+                for recipe, record in zip(recipes, items)
+                for key, amount in record['ingredients'].items()
+            )
+            Recipe.tags.through.objects.bulk_create(
+                Recipe.tags.through(recipe=recipe, tag_id=self.tags[slug])
+                for recipe, record in zip(recipes, items)
+                for slug in record['tags']
+            )
+            fan_out_recipes(recipe.pk for recipe in recipes)
+        if recipes:
+            bump_version(RECIPES_VERSION)
+        return len(recipes), skipped
+
+    def clean(self, data, number):
+        """Проверяет запись архива теми же валидаторами, что и модели.
+
+        Теги и ингредиенты приводятся к кортежам значений каталога,
+        повторы ингредиента схлопываются. Путь к изображению не может
+        выходить за пределы архива.
+        """
+        if not isinstance(data, dict):
+            raise ValidationError('Запись должна быть объектом.')
+        record = {
+            name: Recipe._meta.get_field(name).clean(data.get(name), None)
+            for name in ('name', 'text', 'cooking_time')
+        }
+        record['number'] = number
+        record['pub_date'] = parse_datetime(data.get('pub_date') or '')
+        tags = {}
+        for tag in data['tags']:
+            name, slug = CATALOGS['tags'].clean(tag)
+            tags[slug] = (name, slug)
+        ingredients = {}
+        for item in data['ingredients']:
+            key = CATALOGS['ingredients'].clean(item)
+            ingredients.setdefault(
+                key,
+                RecipeIngredient._meta.get_field('amount').clean(
+                    item.get('amount'), None
+                ),
+            )
+        if not tags or not ingredients:
+            raise ValidationError('Нужны хотя бы один тег и ингредиент.')
+        record['tags'] = tags
+        record['ingredients'] = ingredients
+
+        image_path = os.path.realpath(
+            os.path.join(self.directory, data['image'])
+        )
+        if not image_path.startswith(self.directory + os.sep):
+            raise ValidationError('Изображение вне каталога архива.')
+        _, extension = os.path.splitext(image_path)
+        record['image_path'] = image_path
+        record['storage_name'] = (
+            f'{IMAGE_PREFIX}{self.archive}_{data["id"]}{extension}'
+        )
+        if self.default_author is None:
+            author = data['author']
+            record['author'] = {
+                name: User._meta.get_field(name).clean(author.get(name), None)
+                for name in ('email', 'username', 'first_name', 'last_name')
+            }
+        return record
+
+    def resolve_catalogs(self, records):
+        """Находит id тегов и ингредиентов пакета, добавляя недостающие.
+
+        Недостающие записи добавляются загрузчиком каталогов и сразу
+        читаются обратно, так что на пакет уходит не больше двух
+        запросов на каталог.
+        """
+        tags = {}
+        ingredients = set()
+        for record in records:
+            tags.update(record['tags'])
+            ingredients.update(record['ingredients'])
+
+        missing = [row for slug, row in tags.items() if slug not in self.tags]
+        if missing:
+            self.created['tags'] += CATALOGS['tags'].upsert(missing)[0]
+            self.tags.update(
+                Tag.objects.filter(
+                    slug__in=[slug for _, slug in missing]
+                ).values_list('slug', 'id')
+            )
+
+        missing = ingredients - self.ingredients.keys()
+        if missing:
+            self.created['ingredients'] += CATALOGS['ingredients'].upsert(
+                missing
+            )[0]
+            names = {name for name, _ in missing}
+            for pk, name, unit in CATALOGS['ingredients'].model.objects.filter(
+                name__in=names
+            ).values_list('id', 'name', 'measurement_unit'):
+                if (name, unit) in missing:
+                    self.ingredients[(name, unit)] = pk
+
+    def resolve_authors(self, records):
+        """Находит авторов пакета по email и создает недостающих.
+
+        Созданные пользователи не могут войти по паролю, пока не
+        сбросят его.
+        """
+        if self.default_author is not None:
+            return
+        authors = {
+            record['author']['email']: record['author'] for record in records
+        }
+        missing = authors.keys() - self.authors.keys()
+        if not missing:
+            return
+        self.authors.update(
+            User.objects.filter(email__in=missing).values_list('email', 'id')
+        )
+        new = [authors[email] for email in missing - self.authors.keys()]
+        if new:
+            password = make_password(None)
+            User.objects.bulk_create(
+                (User(password=password, **author) for author in new),
+                ignore_conflicts=True,
+            )
+            created = dict(
+                User.objects.filter(
+                    email__in=[author['email'] for author in new]
+                ).values_list('email', 'id')
+            )
+            self.authors.update(created)
+            self.created['authors'] += len(created)
+
+    def get_author_id(self, record):
+        """Id автора рецепта или None, если его не удалось создать."""
+        if self.default_author is not None:
+            return self.default_author.pk
+        return self.authors.get(record['author']['email'])
+
+    def build_recipe(self, record, author_id, variants):
+        """Сохраняет изображение в хранилище и создает объект рецепта.
+
+        Файл с тем же именем может остаться только от пакета, не
+        записанного в БД из-за сбоя, поэтому он заменяется.
+        """
+        default_storage.delete(record['storage_name'])
+        with open(record['image_path'], 'rb') as image:
+            name = default_storage.save(record['storage_name'], File(image))
+        recipe = Recipe(
+            name=record['name'],
+            text=record['text'],
+            cooking_time=record['cooking_time'],
+            author_id=author_id,
+            image=name,
+        )
+        recipe.image_variants = save_derivatives(
+            recipe.image, RECIPE_IMAGE_SIZES, variants
+        )
+        return recipe
+
+    def warn(self, number, error):
+        """Сообщает о пропущенной строке архива."""
+        if isinstance(error, ValidationError):
+            error = '; '.join(error.messages)
+        self.stderr.write(f'Строка {number} пропущена: {error}')
@@ -0,0 +1,498 @@
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+import requests
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.utils.encoding import iri_to_uri
+
+from account.models import User
+from cooking.management.commands.benchmark_api import percentile
+
+COLLECTION_PATH = (
+    settings.BASE_DIR.parent
+    / 'postman_collection'
+    / 'foodgram.postman_collection.json'
+)
+
+LOAD_PREFIX = 'load_'
+"""Префикс имен и почт пользователей, созданных нагрузочным тестом."""
+
+IDENTITY_VARIABLES = (
+    'username',
+    'email',
+    'secondUserUsername',
+    'secondUserEmail',
+    'thirdUserUsername',
+    'thirdUserEmail',
+)
+"""Переменные коллекции, которые у каждого виртуального пользователя свои.
+
+Коллекция рассчитана на один прогон с фиксированными пользователями,
+поэтому без уникальных имен параллельные регистрации конфликтуют.
+"""
+
+REGISTRATION = 'register_and_get_tokens // No Auth'
+
+SETUP = (
+    (REGISTRATION, 'create_users'),
+    (REGISTRATION, 'get_tokens'),
+    ('tags', 'get_tags_info'),
+    ('ingredients', 'get_ingradients'),
+    ('recipes', 'create_recipes'),
+)
+"""Папки, которые виртуальный пользователь выполняет один раз до нагрузки."""
+
+TEARDOWN = (('delete_requests', 'recipes'),)
+"""Папки, которые виртуальный пользователь выполняет после нагрузки."""
+
+SCENARIOS = {
+    'browse': (
+        50,
+        (
+            ('tags', 'get_tags_info'),
+            ('ingredients', 'get_ingradients'),
+            ('recipes', 'get_recipes'),
+            ('recipes', 'get_recipe_short_link'),
+            ('users', 'get_user_info'),
+            ('recipe_filters_for_favorite_and_shopping_cart',),
+        ),
+    ),
+    'favorite': (10, (('favorite',), ('delete_requests', 'favorite'))),
+    'shopping_cart': (
+        10,
+        (('shopping_cart',), ('delete_requests', 'shopping_cart')),
+    ),
+    'subscriptions': (
+        8,
+        (('subscriptions',), ('delete_requests', 'subscriptions')),
+    ),
+    'recipe_edit': (
+        8,
+        (('recipes', 'update_recipes'), ('recipes', 'recipes_bad_requests')),
+    ),
+    'profile': (
+        5,
+        (
+            ('users', 'set_avatars // User'),
+            ('users', 'reset_password'),
+            ('users', 'users_bad_requests'),
+            ('users', 'delete_avatar // User'),
+        ),
+    ),
+    'auth': (
+        5,
+        (
+            (REGISTRATION, 'get_tokens'),
+            (REGISTRATION, 'logout'),
+            (REGISTRATION, 'create_users_bad_requests'),
+            (REGISTRATION, 'get_token_bad_requests'),
+        ),
+    ),
+    'catalog_bad_requests': (
+        4,
+        (
+            ('tags', 'tags_bad_requests'),
+            ('ingredients', 'ingredients_bad_requests'),
+        ),
+    ),
+}
+"""Сценарии нагрузки: вес и папки коллекции, выполняемые по порядку.
+
+Каждый сценарий оставляет данные в исходном состоянии (добавление
+идет вместе с удалением), поэтому сценарии можно повторять в любом
+порядке, а ожидаемые коллекцией статусы остаются верными.
+"""
+
+VARIABLE_RE = re.compile(r'\{\{(\w+)\}\}')
+STATUS_RE = re.compile(
+    r'pm\.response\.(?:status|code)\s*,.*?\)\s*\.to\.be\.eql\(\s*"([^"]+)"',
+    re.S,
+)
+ALIAS_RE = re.compile(r'const (\w+) = _\.get\(responseData, "(\w+)"\)')
+CAPTURE_RE = re.compile(
+    r'pm\.collectionVariables\.set\(["\'](\w+)["\'], (\w+)'
+    r'(?:\[(\d+)\]\.(\w+))?(\.slice\(0,\s*1\))?\)'
+)
+STATUS_CODES = {status.phrase: status.value for status in HTTPStatus}
+
+
+def get_captures(script):
+    """Переменные, которые тест запроса сохраняет из ответа.
+
+    Поддерживаются два вида присваивания из коллекции:
+    `_.get(responseData, "поле")` и `responseData[индекс].поле`.
+    Каждое правило — кортеж (переменная, индекс, поле, длина).
+    """
+    aliases = dict(ALIAS_RE.findall(script))
+    captures = []
+    for variable, source, index, field, cut in CAPTURE_RE.findall(script):
+        if index:
+            captures.append((variable, int(index), field, 1 if cut else None))
+        elif source in aliases:
+            captures.append((variable, None, aliases[source], None))
+    return captures
+
+
+def parse_items(items, path=(), auth=None):
+    """Плоский список запросов коллекции с путем папок и авторизацией."""
+    parsed = []
+    for item in items:
+        if 'item' in item:
+            parsed += parse_items(
+                item['item'],
+                path + (item['name'],),
+                item.get('auth', auth),
+            )
+            continue
+        request = item['request']
+        script = '\n'.join(
+            line
+            for event in item.get('event', ())
+            if event['listen'] == 'test'
+            for line in event['script']['exec']
+        )
+        status = STATUS_RE.search(script)
+        url = request['url']
+        parsed.append(
+            {
+                'name': f'{path[-1]}/{item["name"]}' if path else item['name'],
+                'path': path,
+                'method': request['method'],
+                'url': url['raw'] if isinstance(url, dict) else url,
+                'headers': [
+                    (header['key'], header['value'])
+                    for header in request.get('header', ())
+                    if not header.get('disabled')
+                ],
+                'auth': request.get('auth', auth),
+                'body': request.get('body', {}).get('raw'),
+                'expected': STATUS_CODES[status[1]] if status else None,
+                'captures': get_captures(script),
+            }
+        )
+    return parsed
+
+
+def load_collection(path):
+    """Читает коллекцию Postman: запросы и значения переменных."""
+    with open(path, encoding='utf-8') as source:
+        collection = json.load(source)
+    variables = {
+        variable['key']: variable['value']
+        for variable in collection.get('variable', ())
+    }
+    return parse_items(collection['item']), variables
+
+
+def select(items, folders):
+    """Запросы из папок в порядке папок, а внутри — в порядке коллекции."""
+    selected = []
+    for folder in folders:
+        found = [
+            item for item in items if item['path'][:len(folder)] == folder
+        ]
+        if not found:
+            raise CommandError(f'В коллекции нет папки {"/".join(folder)}.')
+        selected += found
+    return selected
+
+
+class VirtualUser:
+    """Виртуальный пользователь со своими переменными и сессией HTTP."""
+
+    def __init__(self, number, variables, base_url, timeout):
+        """Готовит переменные с уникальными для пользователя именами."""
+        prefix = f'{LOAD_PREFIX}{number}_'
+        self.variables = {**variables, 'baseUrl': base_url.rstrip('/')}
+        for name in IDENTITY_VARIABLES:
+            self.variables[name] = json.dumps(
+                prefix + json.loads(variables[name])
+            )
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.timings = {}
+        self.errors = {}
+
+    def render(self, value):
+        return VARIABLE_RE.sub(
+            lambda match: str(self.variables.get(match[1], match[0])), value
+        )
+
+    def send(self, item):
+        """Выполняет запрос и возвращает (ответ, время в мс)."""
+        headers = {key: self.render(value) for key, value in item['headers']}
+        auth = item['auth'] or {}
+        if auth.get('type') == 'apikey':
+            options = {
+                option['key']: option['value'] for option in auth['apikey']
+            }
+            headers[options['key']] = self.render(options['value'])
+        body = None
+        if item['body']:
+            body = self.render(item['body']).encode()
+            headers.setdefault('Content-Type', 'application/json')
+        started = time.perf_counter()
+        response = self.session.request(
+            item['method'],
+            iri_to_uri(self.render(item['url'])),
+            data=body,
+            headers=headers,
+            timeout=self.timeout,
+        )
+        return response, (time.perf_counter() - started) * 1000
+
+    def capture(self, item, response):
+        data = response.json()
+        for variable, index, field, length in item['captures']:
+            value = (data[index] if index is not None else data)[field]
+            self.variables[variable] = value[:length] if length else value
+
+    def run(self, items, measure):
+        """Выполняет запросы по порядку.
+
+        Вне замеров ответ с неожиданным статусом прерывает работу, так
+        как следующие запросы зависят от сохраненных переменных.
+        """
+        for item in items:
+            try:
+                response, elapsed = self.send(item)
+            except requests.RequestException as error:
+                if not measure:
+                    raise CommandError(f'{item["name"]}: {error}')
+                self.errors[item['name']] = (
+                    self.errors.get(item['name'], 0) + 1
+                )
+                continue
+            failed = (
+                item['expected'] is not None
+                and response.status_code != item['expected']
+            )
+            if failed and not measure:
+                raise CommandError(
+                    f'{item["name"]}: {item["method"]} {response.url} -> '
+                    f'{response.status_code}, ожидался {item["expected"]}: '
+                    f'{response.text[:300]}'
+                )
+            if not failed and item['captures']:
+                self.capture(item, response)
+            if measure:
+                self.timings.setdefault(item['name'], []).append(elapsed)
+                if failed:
+                    self.errors[item['name']] = (
+                        self.errors.get(item['name'], 0) + 1
+                    )
+
+
+class Command(BaseCommand):
+    """Нагрузочный тест по сценариям postman-коллекции."""
+
+    help = (
+        'Воспроизводит запросы postman-коллекции как взвешенные сценарии '
+        'от нескольких параллельных виртуальных пользователей против '
+        'запущенного сервера и выводит пропускную способность и '
+        'перцентили времени ответа по каждому запросу. Пользователи '
+        f'теста получают префикс {LOAD_PREFIX} и удаляются из БД из '
+        'настроек после прогона.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--collection', default=str(COLLECTION_PATH))
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=10,
+            help='Число виртуальных пользователей.',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=60,
+            help='Длительность нагрузки в секундах.',
+        )
+        parser.add_argument(
+            '--ramp-up',
+            type=float,
+            default=0,
+            help='За сколько секунд запустить всех пользователей.',
+        )
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--weight',
+            action='append',
+            default=[],
+            metavar='СЦЕНАРИЙ=ВЕС',
+            help='Вес сценария: ' + ', '.join(SCENARIOS) + '.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для результатов в формате JSON.',
+        )
+
+    def handle(self, *args, **options):
+        """Функция обработчик."""
+        items, variables = load_collection(options['collection'])
+        weights = self.get_weights(options['weight'])
+        scenarios = {
+            name: select(items, folders)
+            for name, (_, folders) in SCENARIOS.items()
+            if weights[name] > 0
+        }
+        setup, teardown = select(items, SETUP), select(items, TEARDOWN)
+
+        self.cleanup()
+        virtual_users = [
+            VirtualUser(
+                number,
+                variables,
+                options['base_url'],
+                options['timeout'],
+            )
+            for number in range(options['users'])
+        ]
+        failures = []
+        counts = dict.fromkeys(scenarios, 0)
+        elapsed = 0
+        try:
+            self.run_stage(
+                virtual_users,
+                failures,
+                lambda user, number: user.run(setup, measure=False),
+            )
+            started = time.perf_counter()
+            deadline = started + options['ramp_up'] + options['duration']
+            lock = threading.Lock()
+
+            def load(user, number):
+                generator = random.Random(options['seed'] + number)
+                if options['users'] > 1:
+                    time.sleep(
+                        options['ramp_up'] * number / (options['users'] - 1)
+                    )
+                names = list(scenarios)
+                while time.perf_counter() < deadline:
+                    name = generator.choices(
+                        names, [weights[name] for name in names]
+                    )[0]
+                    user.run(scenarios[name], measure=True)
+                    with lock:
+                        counts[name] += 1
+
+            self.run_stage(virtual_users, failures, load)
+            elapsed = time.perf_counter() - started
+            self.run_stage(
+                virtual_users,
+                failures,
+                lambda user, number: user.run(teardown, measure=False),
+            )
+        finally:
+            self.cleanup()
+
+        report = self.build_report(virtual_users, elapsed, counts, options)
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Результаты сохранены в {options["output"]}')
+
+    def get_weights(self, overrides):
+        weights = {name: weight for name, (weight, _) in SCENARIOS.items()}
+        for override in overrides:
+            name, _, weight = override.partition('=')
+            if name not in weights or not weight.isdigit():
+                raise CommandError(f'Неверный вес сценария: {override}.')
+            weights[name] = int(weight)
+        if not any(weights.values()):
+            raise CommandError('Хотя бы один сценарий должен иметь вес.')
+        return weights
+
+    def run_stage(self, virtual_users, failures, target):
+        """Выполняет target в отдельном потоке для каждого пользователя."""
+
+        def run(user, number):
+            try:
+                target(user, number)
+            except CommandError as error:
+                failures.append(f'Пользователь {number}: {error}')
+
+        threads = [
+            threading.Thread(target=run, args=(user, number))
+            for number, user in enumerate(virtual_users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if failures:
+            raise CommandError('\n'.join(failures))
+
+    def cleanup(self):
+        """Удаляет пользователей теста вместе с их данными."""
+        User.objects.filter(username__startswith=LOAD_PREFIX).delete()
+
+    def build_report(self, virtual_users, elapsed, counts, options):
+        timings, errors = {}, {}
+        for user in virtual_users:
+            for name, values in user.timings.items():
+                timings.setdefault(name, []).extend(values)
+            for name, count in user.errors.items():
+                errors[name] = errors.get(name, 0) + count
+        results = []
+        for name in sorted(timings.keys() | errors.keys()):
+            values = sorted(timings.get(name, ()))
+            result = {
+                'name': name,
+                'requests': len(values),
+                'errors': errors.get(name, 0),
+                'rps': round(len(values) / elapsed, 2),
+            }
+            if values:
+                result.update(
+                    p50_ms=round(statistics.median(values), 2),
+                    p95_ms=round(percentile(values, 0.95), 2),
+                    p99_ms=round(percentile(values, 0.99), 2),
+                    max_ms=round(values[-1], 2),
+                )
+            results.append(result)
+        total = sum(result['requests'] for result in results)
+        return {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'base_url': options['base_url'],
+                'users': options['users'],
+                'duration_s': round(elapsed, 2),
+                'scenarios': counts,
+                'requests': total,
+                'errors': sum(result['errors'] for result in results),
+                'rps': round(total / elapsed, 2),
+            },
+            'requests': results,
+        }
+
+    def print_report(self, report):
+        for result in report['requests']:
+            line = (
+                f'{result["name"]:<60} n={result["requests"]:>6} '
+                f'rps={result["rps"]:>7.1f} err={result["errors"]:>4}'
+            )
+            if result['requests']:
+                line += (
+                    f' p50={result["p50_ms"]:>7.1f} '
+                    f'p95={result["p95_ms"]:>7.1f} '
+                    f'p99={result["p99_ms"]:>7.1f} мс'
+                )
+            self.stdout.write(line)
+        meta = report['meta']
+        self.stdout.write(
+            f'Всего: {meta["requests"]} запросов за {meta["duration_s"]} с, '
+            f'{meta["rps"]} запросов/с, ошибок {meta["errors"]}; '
+            f'сценарии: {meta["scenarios"]}'
+        )
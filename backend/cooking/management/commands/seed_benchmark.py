@@ -0,0 +1,289 @@
+import time
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from PIL import Image
+
+from cooking.models import Ingredient, Tag
+from utils.benchmark import (
+    BENCHMARK_PASSWORD,
+    BENCHMARK_PREFIX,
+    SHORT_URLS_SQL,
+    WORDS,
+    add_database_argument,
+    check_database,
+)
+from utils.feed import BACKFILL_SQL
+
+BENCHMARK_IMAGE = 'recipes/images/benchmark.png'
+
+INSERT_USERS_SQL = '''
+INSERT INTO account_user (
+    password, is_superuser, username, first_name, last_name, email,
+    is_staff, is_active, date_joined, avatar_variants
+)
+SELECT
+    %(password)s, false, %(prefix)s || g, 'Имя ' || g, 'Фамилия ' || g,
+    %(prefix)s || g || '@example.com', false, true,
+    now() - make_interval(mins => g), '{}'
+FROM generate_series(1, %(count)s) AS g
+'''
+
+INSERT_RECIPES_SQL = '''
+WITH words AS (SELECT %(words)s::text[] AS vocabulary)
+INSERT INTO cooking_recipe (
+    name, text, author_id, image, image_variants, cooking_time, pub_date
+)
+SELECT
+    (SELECT string_agg(vocabulary[1 + floor(random() * %(size)s)::int], ' ')
+     FROM words, generate_series(1, 2 + g %% 3)),
+    (SELECT string_agg(vocabulary[1 + floor(random() * %(size)s)::int], ' ')
+     FROM words, generate_series(1, 20 + g %% 20)),
+    %(first_user)s + floor(power(random(), 2) * %(users)s)::int,
+    %(image)s,
+    '{}',
+    1 + g %% 120,
+    now() - make_interval(secs => g)
+FROM generate_series(1, %(count)s) AS g
+'''
+"""Авторы выбираются со смещением: у первых пользователей больше рецептов."""
+
+INSERT_TAGS_SQL = '''
+INSERT INTO cooking_recipe_tags (recipe_id, tag_id)
+SELECT id, (%(tags)s::bigint[])[1 + floor(random() * %(size)s)::int]
+FROM cooking_recipe, generate_series(1, 2)
+WHERE id BETWEEN %(first_recipe)s AND %(last_recipe)s
+ON CONFLICT DO NOTHING
+'''
+
+INSERT_INGREDIENTS_SQL = '''
+INSERT INTO cooking_recipeingredient (recipe_id, ingredient_id, amount)
+SELECT
+    id,
+    (%(ingredients)s::bigint[])[1 + floor(random() * %(size)s)::int],
+    1 + floor(random() * 500)::int
+FROM cooking_recipe, generate_series(1, %(per_recipe)s)
+WHERE id BETWEEN %(first_recipe)s AND %(last_recipe)s
+ON CONFLICT DO NOTHING
+'''
+
+INSERT_USER_RECIPES_SQL = '''
+INSERT INTO {table} (user_id, recipe_id)
+SELECT
+    %(first_user)s + floor(random() * %(users)s)::int,
+    %(first_recipe)s + floor(power(random(), 3) * %(recipes)s)::int
+FROM generate_series(1, %(count)s)
+ON CONFLICT DO NOTHING
+'''
+"""Популярность рецептов неравномерна: первые рецепты выбираются чаще."""
+
+INSERT_FOLLOWS_SQL = '''
+INSERT INTO account_follow (user_id, following_id)
+SELECT follower, following FROM (
+    SELECT
+        %(first_user)s + floor(random() * %(users)s)::int AS follower,
+        %(first_user)s + floor(power(random(), 3) * %(users)s)::int
+            AS following
+    FROM generate_series(1, %(count)s)
+) AS pairs
+WHERE follower <> following
+ON CONFLICT DO NOTHING
+'''
+
+BENCHMARK_USERS_SQL = (
+    "SELECT id FROM account_user WHERE username LIKE '{}%'".format(
+        BENCHMARK_PREFIX.replace('_', '\\_')
+    )
+)
+BENCHMARK_RECIPES_SQL = (
+    f'SELECT id FROM cooking_recipe WHERE author_id IN ({BENCHMARK_USERS_SQL})'
+)
+
+DELETE_SQL = (
+    'DELETE FROM cooking_shortenedurl WHERE full_url IN ('
+    + SHORT_URLS_SQL.format('{recipes}')
+    + ')',
+    'DELETE FROM cooking_feedentry WHERE user_id IN ({users}) '
+    'OR recipe_id IN ({recipes})',
+    'DELETE FROM cooking_favorite WHERE user_id IN ({users}) '
+    'OR recipe_id IN ({recipes})',
+    'DELETE FROM cooking_shoppingcart WHERE user_id IN ({users}) '
+    'OR recipe_id IN ({recipes})',
+    'DELETE FROM account_follow WHERE user_id IN ({users}) '
+    'OR following_id IN ({users})',
+    'DELETE FROM cooking_recipeingredient WHERE recipe_id IN ({recipes})',
+    'DELETE FROM cooking_recipe_tags WHERE recipe_id IN ({recipes})',
+    'DELETE FROM cooking_recipe WHERE author_id IN ({users})',
+    'DELETE FROM authtoken_token WHERE user_id IN ({users})',
+    'DELETE FROM account_user WHERE id IN ({users})',
+)
+
+
+class Command(BaseCommand):
+    """Генерация воспроизводимого синтетического набора данных."""
+
+    help = (
+        'Заполняет БД синтетическими пользователями, рецептами, '
+        'избранным, корзинами и подписками для бенчмарков. Одинаковые '
+        'параметры и --seed дают одинаковый набор данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50_000)
+        parser.add_argument('--recipes', type=int, default=500_000)
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=6
+        )
+        parser.add_argument('--favorites', type=int, default=2_000_000)
+        parser.add_argument('--cart', type=int, default=1_000_000)
+        parser.add_argument('--follows', type=int, default=1_000_000)
+        parser.add_argument(
+            '--feed-backfill',
+            type=int,
+            default=10,
+            help='Сколько последних рецептов автора добавить в ленту '
+            'подписчика.',
+        )
+        parser.add_argument('--seed', type=float, default=0.42)
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Только удалить синтетические данные.',
+        )
+        add_database_argument(parser)
+
+    def handle(self, *args, **options):
+        """Функция обработчик."""
+        check_database(options)
+        if not -1 <= options['seed'] <= 1:
+            raise CommandError('--seed должен быть в диапазоне [-1, 1].')
+        self.clear()
+        if options['clear']:
+            return
+        if not Tag.objects.exists() or not Ingredient.objects.exists():
+            raise CommandError('Сначала загрузите теги и ингредиенты.')
+
+        if not default_storage.exists(BENCHMARK_IMAGE):
+            image = BytesIO()
+            Image.new('RGB', (600, 400), 'orange').save(image, 'PNG')
+            default_storage.save(
+                BENCHMARK_IMAGE, ContentFile(image.getvalue())
+            )
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SELECT setseed(%s)', (options['seed'],))
+            params = {
+                'prefix': BENCHMARK_PREFIX,
+                'password': make_password(BENCHMARK_PASSWORD),
+                'count': options['users'],
+            }
+            self.run(cursor, 'Пользователи', INSERT_USERS_SQL, params)
+            first_user, last_user = self.get_range(
+                cursor, 'account_user', BENCHMARK_USERS_SQL
+            )
+            params = {
+                'first_user': first_user,
+                'users': last_user - first_user + 1,
+            }
+
+            words = list(WORDS)
+            params.update(
+                words=words,
+                size=len(words),
+                count=options['recipes'],
+                image=BENCHMARK_IMAGE,
+            )
+            self.run(cursor, 'Рецепты', INSERT_RECIPES_SQL, params)
+            first_recipe, last_recipe = self.get_range(
+                cursor, 'cooking_recipe', BENCHMARK_RECIPES_SQL
+            )
+            params.update(
+                first_recipe=first_recipe,
+                last_recipe=last_recipe,
+                recipes=last_recipe - first_recipe + 1,
+            )
+
+            tags = list(
+                Tag.objects.order_by('id').values_list('id', flat=True)
+            )
+            self.run(
+                cursor, 'Теги рецептов', INSERT_TAGS_SQL,
+                {**params, 'tags': tags, 'size': len(tags)},
+            )
+            ingredients = list(
+                Ingredient.objects.order_by('id').values_list('id', flat=True)
+            )
+            self.run(
+                cursor, 'Ингредиенты рецептов', INSERT_INGREDIENTS_SQL,
+                {
+                    **params,
+                    'ingredients': ingredients,
+                    'size': len(ingredients),
+                    'per_recipe': options['ingredients_per_recipe'],
+                },
+            )
+            for table, label, count in (
+                ('cooking_favorite', 'Избранное', options['favorites']),
+                ('cooking_shoppingcart', 'Корзины', options['cart']),
+            ):
+                self.run(
+                    cursor, label,
+                    INSERT_USER_RECIPES_SQL.format(table=table),
+                    {**params, 'count': count},
+                )
+            self.run(
+                cursor, 'Подписки', INSERT_FOLLOWS_SQL,
+                {**params, 'count': options['follows']},
+            )
+            self.run(
+                cursor, 'Ленты',
+                BACKFILL_SQL.format(
+                    condition='follow.user_id BETWEEN %(first_user)s '
+                    'AND %(last_user)s'
+                ),
+                {
+                    'first_user': first_user,
+                    'last_user': last_user,
+                    'limit': options['feed_backfill'],
+                },
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'ANALYZE account_user, account_follow, cooking_recipe, '
+                'cooking_recipe_tags, cooking_recipeingredient, '
+                'cooking_favorite, cooking_shoppingcart, cooking_feedentry'
+            )
+
+    def run(self, cursor, label, sql, params):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        self.stdout.write(
+            f'{label}: {cursor.rowcount} за '
+            f'{time.perf_counter() - started:.1f} с'
+        )
+
+    def get_range(self, cursor, table, ids_sql):
+        """Границы id вставленных строк; id должны идти подряд."""
+        cursor.execute(
+            f'SELECT min(id), max(id), count(*) FROM {table} '
+            f'WHERE id IN ({ids_sql})'
+        )
+        first, last, count = cursor.fetchone()
+        if not count or last - first + 1 != count:
+            raise CommandError(f'id в {table} идут не подряд.')
+        return first, last
+
+    def clear(self):
+        """Удаляет синтетические данные прошлых запусков."""
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in DELETE_SQL:
+                cursor.execute(
+                    sql.format(
+                        users=BENCHMARK_USERS_SQL,
+                        recipes=BENCHMARK_RECIPES_SQL,
+                    )
+                )
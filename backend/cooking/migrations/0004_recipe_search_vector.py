@@ -0,0 +1,47 @@
+# Generated by Django 4.2 on 2026-10-18 03:09
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = '''
+CREATE FUNCTION cooking_recipe_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce(NEW.text, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER cooking_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, text ON cooking_recipe
+    FOR EACH ROW EXECUTE FUNCTION cooking_recipe_search_vector_update();
+
+UPDATE cooking_recipe SET name = name;
+'''
+
+DROP_SEARCH_VECTOR_SQL = '''
+DROP TRIGGER IF EXISTS cooking_recipe_search_vector_trigger ON cooking_recipe;
+DROP FUNCTION IF EXISTS cooking_recipe_search_vector_update();
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooking', '0003_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Заполняется триггером БД по названию и описанию.', null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_idx'),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2 on 2026-10-18 03:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from utils.constants import FEED_BACKFILL_SIZE
+
+BACKFILL_FEED_SQL = '''
+INSERT INTO cooking_feedentry (user_id, author_id, recipe_id)
+SELECT follow.user_id, follow.following_id, recipe.id
+FROM account_follow AS follow
+CROSS JOIN LATERAL (
+    SELECT id FROM cooking_recipe
+    WHERE author_id = follow.following_id
+    ORDER BY id DESC
+    LIMIT %s
+) AS recipe
+ON CONFLICT DO NOTHING;
+'''
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('account', '0002_user_avatar_variants'),
+        ('cooking', '0005_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='cooking.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи ленты',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_user_recipe'),
+        ),
+        migrations.RunSQL([(BACKFILL_FEED_SQL, [FEED_BACKFILL_SIZE])], migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2 on 2026-10-18 04:02
+
+from django.db import migrations, models
+
+CANONICAL_SQL = '''
+SELECT id, MIN(id) OVER (PARTITION BY name, measurement_unit) AS keep_id
+FROM cooking_ingredient
+'''
+
+MERGE_DUPLICATES_SQL = f'''
+SET CONSTRAINTS ALL IMMEDIATE;
+
+DELETE FROM cooking_recipeingredient AS item
+USING ({CANONICAL_SQL}) AS canonical,
+      cooking_recipeingredient AS other,
+      ({CANONICAL_SQL}) AS other_canonical
+WHERE item.ingredient_id = canonical.id
+  AND other.recipe_id = item.recipe_id
+  AND other.id < item.id
+  AND other.ingredient_id = other_canonical.id
+  AND other_canonical.keep_id = canonical.keep_id;
+
+UPDATE cooking_recipeingredient AS item
+SET ingredient_id = canonical.keep_id
+FROM ({CANONICAL_SQL}) AS canonical
+WHERE item.ingredient_id = canonical.id AND canonical.id <> canonical.keep_id;
+
+DELETE FROM cooking_ingredient AS ingredient
+USING ({CANONICAL_SQL}) AS canonical
+WHERE ingredient.id = canonical.id AND canonical.id <> canonical.keep_id;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooking', '0006_feedentry'),
+    ]
+
+    operations = [
+        migrations.RunSQL(MERGE_DUPLICATES_SQL, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient_name_unit'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-18 12:40
+
+from django.db import migrations
+
+CREATE_INDEX_SQL = '''
+CREATE INDEX CONCURRENTLY IF NOT EXISTS cooking_recipe_tags_tag_recipe_idx
+    ON cooking_recipe_tags (tag_id, recipe_id);
+'''
+
+DROP_INDEX_SQL = '''
+DROP INDEX CONCURRENTLY IF EXISTS cooking_recipe_tags_tag_recipe_idx;
+'''
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('cooking', '0007_ingredient_unique_name_unit'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX_SQL, DROP_INDEX_SQL),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooking', '0008_recipe_tags_tag_recipe_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='pub_date',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Дата публикации'),
+        ),
+    ]
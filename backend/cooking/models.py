@@ -1,10 +1,7 @@
-from io import BytesIO
-
-from PIL import Image as PilImage
-
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
-from django.core.files.base import ContentFile
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
@@ -49,6 +46,12 @@ class Ingredient(models.Model):
     )
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient_name_unit',
+            )
+        ]
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
 
@@ -71,6 +74,13 @@ class Recipe(models.Model):
     image = models.ImageField(
         upload_to='recipes/images/', verbose_name='Изображение рецепта'
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Копии изображения',
+        help_text='Уменьшенные копии изображения в JPEG и WebP.',
+    )
     cooking_time = models.PositiveSmallIntegerField(
         verbose_name='Время приготовления (в минутах)',
         help_text='Укажите время приготовления в минутах.',
@@ -87,13 +97,25 @@ class Recipe(models.Model):
         verbose_name='Ингредиенты',
     )
     pub_date = models.DateTimeField(
-        auto_now=True, verbose_name='Дата публикации'
+        auto_now_add=True, verbose_name='Дата публикации'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор',
+        help_text='Заполняется триггером БД по названию и описанию.',
     )
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=('pub_date', 'id'), name='recipe_pub_date_id_idx'
+            ),
+            GinIndex(fields=('search_vector',), name='recipe_search_idx'),
+        ]
 
     def clean(self):
         """Проверяет, что рецепт имеет хотя бы один тег и ингредиент."""
@@ -108,16 +130,6 @@ class Recipe(models.Model):
                 {'ingredients': 'Необходимо указать хотя бы один ингредиент.'}
             )
 
-    def get_optimized_image(self):
-        """Возвращает оптимизированное изображение рецепта."""
-        image = PilImage.open(self.image)
-        image = image.convert('RGB')
-        image.thumbnail((300, 300))
-
-        thumbnail_io = BytesIO()
-        image.save(thumbnail_io, format='JPEG', quality=85)
-        return ContentFile(thumbnail_io.getvalue(), name=self.image.name)
-
     def __str__(self):
         return f'{self.name[:MAX_SLICE]}'
 
@@ -211,6 +223,47 @@ class ShoppingCart(models.Model):
         return f'{self.recipe} в корзине у пользователя {self.user}'
 
 
+class FeedEntry(models.Model):
+    """Запись ленты подписок: рецепт автора, на которого подписан user.
+
+    Записи создаются при публикации рецепта и при подписке, удаляются
+    при отписке и вместе с рецептом. Автор хранится в записи, чтобы
+    отписка удаляла записи без соединения с рецептами.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='feed_entries',
+        db_index=False,
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='+',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+        related_name='feed_entries',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_feed_user_recipe'
+            )
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+
+    def __str__(self):
+        return f'{self.recipe} в ленте пользователя {self.user}'
+
+
 class ShortenedURL(models.Model):
     """Модель для хранения коротких ссылок рецептов."""
 
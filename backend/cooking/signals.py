@@ -0,0 +1,165 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from account.models import Follow
+from cooking.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from utils.authentication import token_cache
+from utils.conditional import (
+    FAVORITES_VERSION,
+    RECIPES_VERSION,
+    USERS_VERSION,
+)
+from utils.constants import AVATAR_IMAGE_SIZES, RECIPE_IMAGE_SIZES
+from utils.feed import backfill_feed, fan_out_recipes, prune_feed
+from utils.images import delete_derivatives, schedule_derivatives
+from utils.ingredient_index import INGREDIENTS_VERSION
+from utils.link_shortener import link_shortener
+from utils.recipe_cache import (
+    TAGS_VERSION,
+    reset_author_recipes,
+    reset_recipes,
+)
+from utils.shopping_list import CART_VERSION, reset_shopping_lists
+from utils.versions import bump_version
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    """Меняет версию корзины при добавлении или удалении рецепта."""
+    bump_version(CART_VERSION, instance.user_id)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+def favorite_changed(sender, instance, **kwargs):
+    """Меняет версию избранного при добавлении или удалении рецепта."""
+    bump_version(FAVORITES_VERSION, instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    """Создает короткую ссылку на новый рецепт."""
+    if created:
+        link_shortener.shorten_recipe_url(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, **kwargs):
+    """Добавляет новый рецепт в ленты подписчиков автора.
+
+    Рассылка выполняется после фиксации транзакции, чтобы не держать
+    транзакцию создания рецепта открытой на время вставки в ленты. Из
+    лент удаленный рецепт убирает каскадное удаление FeedEntry.
+    """
+    if created:
+        transaction.on_commit(partial(fan_out_recipes, [instance.pk]))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    """Заполняет ленту рецептами автора при подписке."""
+    if created:
+        backfill_feed(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Убирает рецепты автора из ленты при отписке."""
+    prune_feed(instance.user_id, instance.following_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, **kwargs):
+    """Строит уменьшенные копии нового изображения рецепта в фоне."""
+    schedule_derivatives(
+        instance,
+        'image',
+        'image_variants',
+        RECIPE_IMAGE_SIZES,
+        partial(reset_recipes, (instance.pk,)),
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    """Сбрасывает списки покупок, в которые входит измененный рецепт.
+
+    Ингредиенты рецепта в API меняются вместе с сохранением самого
+    рецепта, поэтому отдельные сигналы RecipeIngredient не нужны.
+    Новый рецепт меняет только версию списка рецептов.
+    """
+    if created:
+        bump_version(RECIPES_VERSION)
+        return
+    reset_shopping_lists(instance.pk)
+    reset_recipes((instance.pk,))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """Убирает кеш, короткие ссылки и копии изображения рецепта."""
+    reset_recipes((instance.pk,))
+    link_shortener.forget_recipe_url(instance.pk)
+    transaction.on_commit(
+        partial(
+            delete_derivatives, instance.image_variants, instance.image.storage
+        )
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, **kwargs):
+    """Сбрасывает кеш рецептов при изменении их тегов."""
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        bump_version(TAGS_VERSION)
+    else:
+        reset_recipes((instance.pk,))
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    """Сбрасывает кеш рецептов после правки тега."""
+    bump_version(TAGS_VERSION)
+
+
+@receiver(post_save, sender=User)
+def avatar_saved(sender, instance, **kwargs):
+    """Строит в фоне копии нового аватара и удаляет копии удаленного."""
+    schedule_derivatives(
+        instance,
+        'avatar',
+        'avatar_variants',
+        AVATAR_IMAGE_SIZES,
+        partial(avatar_variants_changed, instance.pk),
+    )
+
+
+def avatar_variants_changed(user_id):
+    """Сбрасывает ответы с копиями аватара после их перестроения."""
+    bump_version(USERS_VERSION)
+    reset_author_recipes(user_id)
+    token_cache.delete_user(user_id)
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields, **kwargs):
+    """Сбрасывает кеш рецептов автора после правки его профиля.
+
+    Обновление только даты последнего входа профиль не меняет.
+    """
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    reset_author_recipes(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_changed(sender, instance, **kwargs):
+    """Перестраивает поисковый индекс ингредиентов при правке каталога."""
+    bump_version(INGREDIENTS_VERSION)
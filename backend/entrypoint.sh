@@ -8,6 +8,7 @@ while ! nc -z db 5432; do
 done
 
 python manage.py migrate
+python manage.py createcachetable
 python manage.py collectstatic --noinput
 python manage.py create_superuser
 
@@ -16,4 +17,4 @@ mkdir -p /app/backend_static/static
 cp -r /app/static/. /app/backend_static/static/
 
 
-exec gunicorn --bind 0.0.0.0:8000 foodgram.wsgi
+exec gunicorn --config gunicorn.conf.py --bind 0.0.0.0:8000 foodgram.wsgi
@@ -0,0 +1,37 @@
+import os
+import shutil
+
+# Каталог должен быть задан до первого импорта prometheus_client: класс
+# значений метрик выбирается при импорте, и воркеры наследуют модуль,
+# импортированный в мастере. Поэтому сам prometheus_client здесь
+# импортируется только внутри хуков.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus')
+
+
+def on_starting(server):
+    """Очищает метрики прошлого запуска до старта воркеров."""
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+
+def post_worker_init(worker):
+    """Проверяет, что воркер пишет метрики в общий каталог.
+
+    Иначе каждый воркер копит метрики у себя в памяти, а /metrics
+    отдает пустую агрегацию.
+    """
+    from prometheus_client import values
+
+    if values.ValueClass is values.MutexValue:
+        raise RuntimeError(
+            'prometheus_client импортирован до установки '
+            'PROMETHEUS_MULTIPROC_DIR, метрики воркеров не собираются.'
+        )
+
+
+def child_exit(server, worker):
+    """Убирает метрики завершившегося воркера из агрегации."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
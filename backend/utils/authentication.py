@@ -0,0 +1,114 @@
+import hashlib
+import pickle
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from utils.constants import (
+    TOKEN_CACHE_SIZE,
+    TOKEN_CACHE_TTL,
+    TOKEN_SHARED_CACHE_TTL,
+)
+from utils.lru import LRUCache
+from utils.versions import bump_versions, get_version
+
+TOKEN_VERSION = 'auth-token'
+
+
+def get_token_hash(key):
+    """Хеш токена, чтобы сам токен не попадал в кеш."""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def get_token_cache_key(key):
+    """Ключ кеша записи токена."""
+    return f'{TOKEN_VERSION}:{get_token_hash(key)}'
+
+
+class TokenCache:
+    """Двухуровневый кеш соответствия токена пользователю.
+
+    Первый уровень — LRU-кеш процесса с коротким TTL, второй — общий
+    кеш Django из настройки TOKEN_CACHE_ALIAS, если она задана. Записи
+    хранятся сериализованными, поэтому каждый запрос получает свой
+    экземпляр пользователя и не может испортить закешированный.
+
+    Каждая запись помечена версией токена из общего кеша (см.
+    utils.versions), прочитанной до обращения к БД. Запись из любого
+    уровня отдается, только если версия не изменилась. При выходе и
+    деактивации пользователя версии его токенов сбрасываются, поэтому
+    локальные кеши всех процессов перестают их принимать сразу, а не
+    через TOKEN_CACHE_TTL секунд.
+    """
+
+    def __init__(self):
+        """Создает пустой локальный кеш."""
+        self.local = LRUCache(TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+    @property
+    def shared(self):
+        alias = getattr(settings, 'TOKEN_CACHE_ALIAS', None)
+        return caches[alias] if alias else None
+
+    def get_version(self, key):
+        """Текущая версия токена, ее нужно прочитать до запроса к БД."""
+        return get_version(TOKEN_VERSION, get_token_hash(key))
+
+    def get(self, key, version):
+        cache_key = get_token_cache_key(key)
+        record = self.local.get(cache_key)
+        if record is not None and record[0] != version:
+            self.local.delete(cache_key)
+            record = None
+        if record is None and self.shared is not None:
+            record = self.shared.get(cache_key)
+            if record is None or record[0] != version:
+                return None
+            self.local.set(cache_key, record)
+        return pickle.loads(record[1]) if record is not None else None
+
+    def set(self, key, user, token, version):
+        cache_key = get_token_cache_key(key)
+        record = (version, pickle.dumps((user, token)))
+        self.local.set(cache_key, record)
+        if self.shared is not None:
+            self.shared.set(cache_key, record, TOKEN_SHARED_CACHE_TTL)
+
+    def delete(self, *keys):
+        """Сбрасывает версии токенов и удаляет их записи."""
+        bump_versions(TOKEN_VERSION, [get_token_hash(key) for key in keys])
+        cache_keys = [get_token_cache_key(key) for key in keys]
+        for cache_key in cache_keys:
+            self.local.delete(cache_key)
+        if cache_keys and self.shared is not None:
+            self.shared.delete_many(cache_keys)
+
+    def delete_user(self, user_id):
+        """Удаляет записи всех токенов пользователя."""
+        self.delete(
+            *Token.objects.filter(user_id=user_id).values_list(
+                'key', flat=True
+            )
+        )
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кешированием пользователя.
+
+    Без кеша каждый запрос выполняет запрос Token + User к БД еще до
+    начала работы представления.
+    """
+
+    def authenticate_credentials(self, key):
+        version = token_cache.get_version(key)
+        cached = token_cache.get(key, version)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token, version)
+        return user, token
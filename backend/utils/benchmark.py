@@ -0,0 +1,55 @@
+from django.core.management import CommandError
+from django.db import connection
+
+BENCHMARK_PREFIX = 'bench_'
+"""Префикс имен синтетических пользователей."""
+
+BENCHMARK_PASSWORD = 'bench-password'
+"""Пароль всех синтетических пользователей."""
+
+WORDS = (
+    'борщ', 'суп', 'курица', 'говядина', 'свинина', 'рыба', 'лосось',
+    'салат', 'картофель', 'морковь', 'лук', 'чеснок', 'томаты', 'огурцы',
+    'сметана', 'сливки', 'сыр', 'творог', 'блины', 'оладьи', 'пирог',
+    'запеканка', 'каша', 'гречка', 'рис', 'паста', 'соус', 'грибы',
+    'тесто', 'десерт', 'шоколад', 'ягоды', 'яблоки', 'мед', 'орехи',
+    'жареный', 'тушеный', 'запеченный', 'домашний', 'быстрый', 'легкий',
+    'праздничный', 'острый', 'сладкий', 'постный', 'классический',
+    'приготовить', 'нарезать', 'обжарить', 'добавить', 'посолить',
+    'перемешать', 'варить', 'подавать', 'украсить', 'зеленью', 'минут',
+)
+"""Частые кулинарные слова для названий и описаний синтетических рецептов."""
+
+SHORT_URLS_SQL = (
+    "SELECT '/recipes/' || id || '/' FROM cooking_recipe WHERE id IN ({})"
+)
+"""Полные URL коротких ссылок рецептов, как в LinkShortener.get_recipe_url.
+
+Короткие ссылки не связаны с рецептом внешним ключом, поэтому при
+удалении синтетических рецептов их нужно удалять отдельно.
+"""
+
+
+def add_database_argument(parser):
+    """Добавляет обязательный параметр с именем БД для записи."""
+    parser.add_argument(
+        '--confirm-database',
+        required=True,
+        metavar='NAME',
+        help='Имя БД из настроек: команда пишет в нее синтетические '
+        'данные и удаляет их.',
+    )
+
+
+def check_database(options):
+    """Проверяет, что пользователь подтвердил БД, в которую идет запись.
+
+    Бенчмарки пишут в ту БД, на которую указывают настройки, поэтому
+    без явного подтверждения имени они могли бы засорить рабочую базу.
+    """
+    name = connection.settings_dict['NAME']
+    if options['confirm_database'] != name:
+        raise CommandError(
+            f'Команда пишет синтетические данные в БД {name}. '
+            f'Если это нужная БД, передайте --confirm-database {name}.'
+        )
@@ -0,0 +1,186 @@
+import csv
+import json
+import os
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+
+from cooking.models import Ingredient, Tag
+from utils.constants import IMPORT_READ_CHUNK_SIZE
+from utils.ingredient_index import INGREDIENTS_VERSION
+from utils.recipe_cache import TAGS_VERSION
+
+FORMATS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+"""Форматы файлов каталога по расширению."""
+
+UPSERT_SQL = '''
+INSERT INTO {table} ({columns})
+VALUES {values}
+ON CONFLICT ({unique}) DO {action}
+RETURNING (xmax = 0) AS inserted
+'''
+"""Пакетная вставка: `action` — NOTHING или UPDATE только изменившихся."""
+
+UPDATE_ACTION = '''UPDATE SET {assignments}
+WHERE ({target}) IS DISTINCT FROM ({excluded})'''
+"""Обновление существующей записи, только если значения отличаются."""
+
+
+def detect_format(path):
+    """Определяет формат файла по расширению или возвращает None."""
+    return FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def read_csv(file):
+    """Построчно читает CSV с заголовком."""
+    yield from csv.DictReader(file)
+
+
+def read_jsonl(file):
+    """Построчно читает JSON Lines, пропуская пустые строки."""
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_json(file, chunk_size=IMPORT_READ_CHUNK_SIZE):
+    """Потоково читает JSON-массив объектов.
+
+    Файл читается кусками по `chunk_size` символов, в памяти остается
+    только недоразобранный хвост, поэтому размер файла не ограничен.
+    Элементы массива должны быть объектами: объект считается
+    прочитанным только после закрывающей скобки.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    started = False
+    while True:
+        while position < len(buffer) and (
+            buffer[position].isspace() or (started and buffer[position] == ',')
+        ):
+            position += 1
+        if position == len(buffer):
+            if eof:
+                raise ValueError('Неожиданный конец JSON-массива.')
+            buffer, position = file.read(chunk_size), 0
+            eof = not buffer
+            continue
+        if not started:
+            if buffer[position] != '[':
+                raise ValueError('Файл должен содержать JSON-массив.')
+            started = True
+            position += 1
+            continue
+        if buffer[position] == ']':
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield item
+
+
+READERS = {'csv': read_csv, 'json': read_json, 'jsonl': read_jsonl}
+"""Функции чтения строк каталога по формату."""
+
+
+class CatalogUpsert:
+    """Пакетная загрузка каталога через INSERT ... ON CONFLICT.
+
+    Строка каталога — значения полей `fields`; `unique` — поля
+    уникального ограничения, по которым ищется существующая запись.
+    Остальные поля обновляются, только если значение изменилось, так
+    что повторная загрузка того же файла ничего не пишет.
+    """
+
+    def __init__(self, model, fields, unique, version_name):
+        """Описывает каталог: модель, поля, ключ и версию кеша."""
+        self.model = model
+        self.fields = fields
+        self.unique = unique
+        self.version_name = version_name
+
+    def clean(self, row):
+        """Проверяет строку файла и возвращает кортеж значений полей.
+
+        Значения очищаются от пробелов по краям и проверяются
+        валидаторами полей модели. Ошибка — ValidationError.
+        """
+        if not isinstance(row, dict):
+            raise ValidationError('Запись должна быть объектом.')
+        values = []
+        for name in self.fields:
+            value = row.get(name)
+            if isinstance(value, str):
+                value = value.strip()
+            values.append(self.model._meta.get_field(name).clean(value, None))
+        return tuple(values)
+
+    def get_key(self, values):
+        """Значения уникальных полей строки."""
+        return tuple(values[self.fields.index(name)] for name in self.unique)
+
+    def get_action(self):
+        """Действие при конфликте ключа: обновить поля или ничего."""
+        updated = [name for name in self.fields if name not in self.unique]
+        if not updated:
+            return 'NOTHING'
+        table = self.model._meta.db_table
+        return UPDATE_ACTION.format(
+            assignments=', '.join(
+                f'{name} = EXCLUDED.{name}' for name in updated
+            ),
+            excluded=', '.join(f'EXCLUDED.{name}' for name in updated),
+            target=', '.join(f'{table}.{name}' for name in updated),
+        )
+
+    def upsert(self, rows):
+        """Загружает пакет строк одним запросом.
+
+        Возвращает число добавленных и обновленных записей. Строки с
+        одинаковым ключом в пакете схлопываются заранее: PostgreSQL не
+        дает изменить одну запись дважды в одном запросе.
+        """
+        rows = list(
+            {self.get_key(values): values for values in rows}.values()
+        )
+        if not rows:
+            return 0, 0
+        placeholder = '({})'.format(', '.join(['%s'] * len(self.fields)))
+        sql = UPSERT_SQL.format(
+            table=self.model._meta.db_table,
+            columns=', '.join(self.fields),
+            values=', '.join([placeholder] * len(rows)),
+            unique=', '.join(self.unique),
+            action=self.get_action(),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql, [value for values in rows for value in values]
+            )
+            results = [inserted for inserted, in cursor.fetchall()]
+        inserted = sum(results)
+        return inserted, len(results) - inserted
+
+
+CATALOGS = {
+    'ingredients': CatalogUpsert(
+        Ingredient,
+        ('name', 'measurement_unit'),
+        ('name', 'measurement_unit'),
+        INGREDIENTS_VERSION,
+    ),
+    'tags': CatalogUpsert(Tag, ('name', 'slug'), ('slug',), TAGS_VERSION),
+}
+"""Загружаемые каталоги: имя в команде и способ загрузки."""
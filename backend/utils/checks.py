@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.db import connections
+
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+"""Кеш в памяти процесса, не общий для воркеров и команд."""
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Проверяет, что кеш по умолчанию общий для всех процессов.
+
+    В нем хранятся версии данных (utils.versions): сброс версии в одном
+    воркере или в команде manage.py должен быть виден остальным, иначе
+    они продолжают отдавать 304 и устаревшие данные до перезапуска.
+    """
+    if settings.CACHES['default']['BACKEND'] != LOCAL_CACHE_BACKEND:
+        return []
+    message = (
+        'LocMemCache не разделяется между процессами: изменения версий '
+        'данных не видны другим воркерам и командам manage.py.'
+    )
+    hint = 'Укажите CACHE_BACKEND с Redis, Memcached или DatabaseCache.'
+    if settings.DEBUG:
+        return [Warning(message, hint=hint, id='foodgram.W001')]
+    return [Error(message, hint=hint, id='foodgram.E001')]
+
+
+@register(Tags.database)
+def check_postgresql(app_configs, databases=None, **kwargs):
+    """Проверяет, что основная БД — PostgreSQL.
+
+    Миграции и API используют триггеры, полнотекстовый поиск и
+    INSERT ... ON CONFLICT, которых в других СУБД нет.
+    """
+    if connections['default'].vendor == 'postgresql':
+        return []
+    return [
+        Error(
+            'Поддерживается только PostgreSQL.',
+            hint='Укажите ENGINE django.db.backends.postgresql.',
+            id='foodgram.E002',
+        )
+    ]
@@ -0,0 +1,101 @@
+import hashlib
+
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+from rest_framework.permissions import SAFE_METHODS
+
+from utils.versions import get_versions
+
+RECIPES_VERSION = 'recipes'
+"""Версия списка рецептов: меняется при создании, правке и удалении."""
+
+USERS_VERSION = 'users'
+"""Версия списка пользователей и их профилей."""
+
+FAVORITES_VERSION = 'favorites'
+"""Версия избранного пользователя, ключ ('favorites', id)."""
+
+FOLLOWS_VERSION = 'follows'
+"""Версия подписок пользователя, ключ ('follows', id)."""
+
+
+class NotModified(Exception):
+    """Прерывает обработку запроса готовым ответом 304 или 412."""
+
+    def __init__(self, response):
+        """Сохраняет ответ, который нужно вернуть клиенту."""
+        super().__init__(response.status_code)
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """Миксин представления, отвечающего 304 на условные GET-запросы.
+
+    Валидаторы строятся только из версий в кеше (см. utils.versions),
+    без запросов к БД и сериализации: ETag — хеш версий из
+    `get_version_keys`, зрителя, адреса, формата и кодировки ответа,
+    Last-Modified — самая поздняя из версий. Проверка выполняется после
+    аутентификации и проверки прав, для действий из
+    `conditional_actions`.
+    """
+
+    conditional_actions = ('list', 'retrieve')
+
+    def get_version_keys(self):
+        """Ключи версий данных, от которых зависит ответ."""
+        raise NotImplementedError
+
+    def get_validators(self, request):
+        """Возвращает ETag и Last-Modified ответа на запрос."""
+        versions = get_versions(*self.get_version_keys())
+        etag = hashlib.md5(
+            repr(
+                (
+                    versions,
+                    request.user.pk,
+                    request.get_host(),
+                    request.get_full_path(),
+                    request.accepted_media_type,
+                    request.META.get('HTTP_ACCEPT_ENCODING', ''),
+                )
+            ).encode()
+        ).hexdigest()
+        return quote_etag(etag), max(versions) // 10**9
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None
+        if (
+            request.method in SAFE_METHODS
+            and self.action in self.conditional_actions
+        ):
+            etag, last_modified = self.validators = self.get_validators(
+                request
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        validators = getattr(self, 'validators', None)
+        if validators and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Authorization',))
+        return response
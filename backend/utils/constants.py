@@ -24,3 +24,96 @@ MEASUREMENT_UNIT_LENGTH = 15
 
 PAGE_SIZE = 6
 """Количество объектов на странице для пагинации."""
+
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60 * 24
+"""Время хранения готового файла списка покупок в кеше (в секундах)."""
+
+SHOPPING_LIST_CACHE_MAX_SIZE = 1024 * 1024
+"""Максимальный размер файла списка покупок, сохраняемого в кеш."""
+
+INGREDIENT_SEARCH_LIMIT = 50
+"""Максимальное количество ингредиентов в выдаче поиска по названию."""
+
+INGREDIENT_INDEX_CHECK_INTERVAL = 5
+"""Как часто процесс сверяет версию индекса ингредиентов (в секундах)."""
+
+INGREDIENT_INDEX_MAX_SUFFIXES = 1000000
+"""Предел суффиксов в индексе, сверх него поиск по вхождению идет в БД."""
+
+SEARCH_CONFIG = 'russian'
+"""Конфигурация полнотекстового поиска PostgreSQL для рецептов."""
+
+RECIPE_CACHE_TIMEOUT = 60 * 60 * 24
+"""Время хранения представления рецепта в кеше (в секундах)."""
+
+SHORT_LINK_CACHE_SIZE = 10000
+"""Количество коротких ссылок в LRU-кеше процесса."""
+
+SHORT_LINK_MAX_AGE = 60 * 60 * 24 * 30
+"""Время кеширования редиректа по короткой ссылке клиентом (в секундах)."""
+
+RECIPE_IMAGE_SIZES = {'small': 300, 'medium': 600}
+"""Размеры копий изображения рецепта: метка и сторона квадрата в px."""
+
+AVATAR_IMAGE_SIZES = {'small': 64, 'medium': 256}
+"""Размеры копий аватара: метка и сторона квадрата в px."""
+
+IMAGE_DERIVATIVE_WORKERS = 2
+"""Потоки процесса, строящие копии изображений после сохранения."""
+
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+"""Максимальный размер загружаемого изображения (в байтах)."""
+
+IMAGE_MAX_DIMENSION = 8000
+"""Максимальная ширина и высота загружаемого изображения (в px)."""
+
+IMAGE_MAX_PIXELS = 40_000_000
+"""Максимальная площадь загружаемого изображения (в px)."""
+
+TOKEN_CACHE_SIZE = 10000
+"""Количество токенов в LRU-кеше аутентификации процесса."""
+
+TOKEN_CACHE_TTL = 30
+"""Время жизни токена в кеше процесса (в секундах)."""
+
+TOKEN_SHARED_CACHE_TTL = 60 * 5
+"""Время жизни токена в общем кеше (в секундах)."""
+
+REPLICA_STICKY_TIME = 5
+"""Время после записи, когда чтения пользователя идут в основную БД."""
+
+METRICS_SIZE_BUCKETS = tuple(2**power for power in range(8, 23, 2))
+"""Границы гистограммы размера ответа (в байтах): от 256 Б до 4 МБ."""
+
+METRICS_QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+"""Границы гистограммы числа SQL-запросов за один HTTP-запрос."""
+
+FEED_BACKFILL_SIZE = 1000
+"""Сколько последних рецептов автора попадает в ленту при подписке."""
+
+BULK_RECIPES_MAX_SIZE = 100
+"""Максимальное число рецептов в одном пакетном запросе."""
+
+CATALOG_SNAPSHOT_TIMEOUT = 60 * 60 * 24 * 7
+"""Время хранения снимка каталога тегов или ингредиентов в кеше (в с)."""
+
+CATALOG_SNAPSHOT_MAX_AGE = 60 * 60 * 24 * 365
+"""Время кеширования клиентом снимка каталога по адресу с хешем (в с)."""
+
+CATALOG_SNAPSHOT_HASH_LENGTH = 16
+"""Длина хеша содержимого в адресе снимка каталога."""
+
+CATALOG_SNAPSHOT_BROTLI_QUALITY = 9
+"""Степень сжатия снимка brotli: 11 на больших каталогах в разы медленнее."""
+
+IMPORT_BATCH_SIZE = 5000
+"""Количество строк каталога в одном запросе загрузки."""
+
+IMPORT_READ_CHUNK_SIZE = 64 * 1024
+"""Размер куска, которым читается JSON-файл каталога (в символах)."""
+
+RECIPE_EXPORT_CHUNK_SIZE = 500
+"""Количество рецептов, загружаемых из БД за раз при выгрузке архива."""
+
+RECIPE_IMPORT_BATCH_SIZE = 200
+"""Количество рецептов архива, загружаемых в БД одной транзакцией."""
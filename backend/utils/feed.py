@@ -0,0 +1,53 @@
+from django.db import connection
+
+from cooking.models import FeedEntry
+from utils.constants import FEED_BACKFILL_SIZE
+
+FAN_OUT_MANY_SQL = '''
+INSERT INTO cooking_feedentry (user_id, author_id, recipe_id)
+SELECT follow.user_id, recipe.author_id, recipe.id
+FROM cooking_recipe AS recipe
+JOIN account_follow AS follow ON follow.following_id = recipe.author_id
+WHERE recipe.id = ANY(%(recipes)s)
+ON CONFLICT DO NOTHING
+'''
+
+BACKFILL_SQL = '''
+INSERT INTO cooking_feedentry (user_id, author_id, recipe_id)
+SELECT follow.user_id, follow.following_id, recipe.id
+FROM account_follow AS follow
+CROSS JOIN LATERAL (
+    SELECT id FROM cooking_recipe
+    WHERE author_id = follow.following_id
+    ORDER BY id DESC
+    LIMIT %(limit)s
+) AS recipe
+WHERE {condition}
+ON CONFLICT DO NOTHING
+'''
+"""Заполнение лент подписками, отобранными условием `condition`."""
+
+
+def fan_out_recipes(recipe_ids):
+    """Добавляет новые рецепты в ленты подписчиков их авторов.
+
+    Выполняется одним INSERT ... SELECT, без загрузки подписчиков в
+    Python, поэтому стоимость растет только с числом вставленных строк.
+    Рецепты, удаленные к моменту вызова, пропускаются.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(FAN_OUT_MANY_SQL, {'recipes': list(recipe_ids)})
+
+
+def backfill_feed(follow):
+    """Добавляет в ленту подписчика последние рецепты нового автора."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            BACKFILL_SQL.format(condition='follow.id = %(follow)s'),
+            {'follow': follow.pk, 'limit': FEED_BACKFILL_SIZE},
+        )
+
+
+def prune_feed(user_id, author_id):
+    """Удаляет из ленты пользователя рецепты автора после отписки."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
@@ -1,17 +1,233 @@
 import base64
+import binascii
+from tempfile import SpooledTemporaryFile
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image
 from rest_framework import serializers
+from rest_framework.fields import get_attribute
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from utils.constants import (
+    IMAGE_MAX_DIMENSION,
+    IMAGE_MAX_PIXELS,
+    IMAGE_UPLOAD_MAX_SIZE,
+)
+from utils.images import get_current_variants, get_derivative_urls
+
+BASE64_CHUNK_SIZE = 64 * 1024
+"""Размер порции base64 при декодировании, кратен четырем."""
+
+VARIANTS_SUFFIX = '_variants'
+"""Суффикс поля с описанием копий, остаток — имя поля изображения."""
+
+DATA_URI_PREFIX = 'data:image'
+BASE64_MARKER = ';base64,'
+
+
+def get_objects_in_bulk(queryset, pks, message):
+    """Находит объекты по списку id одним запросом `IN`.
+
+    Возвращает словарь {id: объект}. Если каких-то объектов нет, все
+    отсутствующие id перечисляются в одной ошибке: `message` получает
+    их через `{pk_values}`.
+    """
+    objects = queryset.in_bulk(set(pks))
+    missing = [str(pk) for pk in dict.fromkeys(pks) if pk not in objects]
+    if missing:
+        raise serializers.ValidationError(
+            message.format(pk_values=', '.join(missing))
+        )
+    return objects
 
 
 class Base64ImageField(serializers.ImageField):
-    """Класс для обеспечения логики загрузки картинок."""
+    """Класс для обеспечения логики загрузки картинок.
+
+    Принимает data URI с изображением в base64 или файл из multipart
+    запроса. Base64 декодируется порциями во временный файл, который
+    остается в памяти до FILE_UPLOAD_MAX_MEMORY_SIZE байт. Размер файла
+    и размеры изображения проверяются по заголовку до того, как
+    декодируется все содержимое.
+    """
+
+    default_error_messages = {
+        'too_large': (
+            'Размер изображения не должен превышать {max_size} байт.'
+        ),
+        'too_many_pixels': (
+            'Изображение не должно быть больше {max_dimension} px по '
+            'стороне и {max_pixels} px по площади.'
+        ),
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data.startswith(DATA_URI_PREFIX):
+            data = self.decode_data_uri(data)
+        elif getattr(data, 'size', None) is not None:
+            self.check_size(data.size)
+        file = serializers.FileField.to_internal_value(self, data)
+        self.check_image(file)
+        return file
+
+    def check_size(self, size):
+        if size > IMAGE_UPLOAD_MAX_SIZE:
+            self.fail('too_large', max_size=IMAGE_UPLOAD_MAX_SIZE)
+
+    def check_dimensions(self, image):
+        width, height = image.size
+        if (
+            max(width, height) > IMAGE_MAX_DIMENSION
+            or width * height > IMAGE_MAX_PIXELS
+        ):
+            self.fail(
+                'too_many_pixels',
+                max_dimension=IMAGE_MAX_DIMENSION,
+                max_pixels=IMAGE_MAX_PIXELS,
+            )
+
+    def open_image(self, file):
+        """Читает заголовок изображения, не декодируя пиксели."""
+        try:
+            return Image.open(file)
+        except Image.DecompressionBombError:
+            self.fail(
+                'too_many_pixels',
+                max_dimension=IMAGE_MAX_DIMENSION,
+                max_pixels=IMAGE_MAX_PIXELS,
+            )
+        except Exception:
+            return None
+
+    def decode_data_uri(self, data):
+        """Декодирует data URI во временный файл порциями.
+
+        Размер результата известен по длине строки, поэтому слишком
+        большие файлы отклоняются без декодирования. Размеры изображения
+        проверяются по первой порции, если заголовок в нее поместился.
+        """
+        start = data.find(BASE64_MARKER)
+        if start == -1:
+            self.fail('invalid')
+        start += len(BASE64_MARKER)
+        self.check_size((len(data) - start) * 3 // 4)
+
+        file = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        pending = ''
+        try:
+            for offset in range(start, len(data), BASE64_CHUNK_SIZE):
+                chunk = pending + ''.join(
+                    data[offset:offset + BASE64_CHUNK_SIZE].split()
+                )
+                whole = len(chunk) - len(chunk) % 4
+                chunk, pending = chunk[:whole], chunk[whole:]
+                try:
+                    file.write(base64.b64decode(chunk, validate=True))
+                except binascii.Error:
+                    self.fail('invalid_image')
+                if offset == start:
+                    file.seek(0)
+                    image = self.open_image(file)
+                    if image is not None:
+                        self.check_dimensions(image)
+                    file.seek(0, 2)
+            if pending:
+                self.fail('invalid_image')
+        except serializers.ValidationError:
+            file.close()
+            raise
+
+        size = file.tell()
+        file.seek(0)
+        image = self.open_image(file)
+        if image is None:
+            file.close()
+            self.fail('invalid_image')
+        file.seek(0)
+        return UploadedFile(
+            file,
+            name=f'temp.{image.format.lower()}',
+            content_type=Image.MIME.get(image.format),
+            size=size,
+        )
+
+    def check_image(self, file):
+        """Проверяет изображение средствами Pillow без копии в памяти.
+
+        Заменяет проверку `ImageField` из Django, которая читает весь
+        файл в BytesIO.
+        """
+        image = self.open_image(file)
+        if image is None:
+            self.fail('invalid_image')
+        self.check_dimensions(image)
+        try:
+            image.verify()
+        except Exception:
+            self.fail('invalid_image')
+        if hasattr(file, 'content_type'):
+            file.content_type = Image.MIME.get(image.format)
+        file.seek(0)
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Поле с URL уменьшенных копий изображения.
+
+    Отдает `{метка: {'jpeg': url, 'webp': url}}`; пока копии не
+    построены, возвращает пустой словарь. Копии строятся в фоне, поэтому
+    описание сверяется с файлом из соседнего поля (`image` для
+    `image_variants`): копии прежнего файла скоро будут удалены.
+    """
+
+    def get_attribute(self, instance):
+        variants = super().get_attribute(instance)
+        *path, name = self.source_attrs
+        image = getattr(
+            get_attribute(instance, path), name.removesuffix(VARIANTS_SUFFIX)
+        )
+        return get_current_variants(variants, image)
+
+    def to_representation(self, value):
+        return get_derivative_urls(value, self.context.get('request'))
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Список связанных объектов, загружаемых одним запросом.
+
+    Стандартное поле ищет каждый id отдельным запросом и сообщает об
+    отсутствующих по одному; здесь id сначала проверяются как целые
+    числа, а затем все объекты выбираются вместе.
+    """
+
+    default_error_messages = {
+        'does_not_exist': 'Объекты с id {pk_values} не существуют.',
+    }
 
     def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        pk_field = serializers.IntegerField(min_value=1)
+        pks = [pk_field.run_validation(pk) for pk in data]
+        objects = get_objects_in_bulk(
+            self.child_relation.get_queryset(),
+            pks,
+            self.error_messages['does_not_exist'],
+        )
+        return [objects[pk] for pk in pks]
+
 
-            data = ContentFile(base64.b64decode(imgstr), name=f'temp.{ext}')
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Связь по id, со списком значений работающая через IN-запрос."""
 
-        return super().to_internal_value(data)
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
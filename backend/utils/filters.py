@@ -1,13 +1,24 @@
-from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import (
+    BooleanField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+)
 from django_filters.rest_framework import (
     BooleanFilter,
     CharFilter,
     FilterSet,
+    MultipleChoiceFilter,
     NumberFilter,
 )
-from django_filters.rest_framework.filters import AllValuesMultipleFilter
+from rest_framework.filters import OrderingFilter
 
 from cooking.models import Ingredient, Recipe
+from utils.constants import SEARCH_CONFIG
+from utils.tag_registry import get_tag_choices, tag_registry
 
 
 class IngredientFilter(FilterSet):
@@ -31,19 +42,66 @@ class IngredientFilter(FilterSet):
         ).order_by('-startswith')
 
 
+class TagSlugFilter(MultipleChoiceFilter):
+    """Фильтр рецептов по слагам тегов, достаточно любого из них.
+
+    Допустимые слаги берутся из tag_registry, а не выбираются из БД на
+    каждый запрос. Отбор идет через EXISTS по промежуточной таблице
+    рецептов и тегов, поэтому рецепт с несколькими подходящими тегами
+    не повторяется в выдаче и distinct не нужен.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Берет варианты выбора из справочника тегов."""
+        kwargs.setdefault('choices', get_tag_choices)
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        return qs.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe_id=OuterRef('pk'),
+                    tag_id__in=tag_registry.get_ids(value),
+                )
+            )
+        )
+
+
 class RecipeFilter(FilterSet):
     """Кастомный фильтрсет для фильтрации рецептов."""
 
-    tags = AllValuesMultipleFilter(field_name='tags__slug')
+    tags = TagSlugFilter()
     author = NumberFilter(
         field_name='author__id',
     )
     is_in_shopping_cart = BooleanFilter(method='filter_shopping_cart')
     is_favorited = BooleanFilter(method='filter_favorites')
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_in_shopping_cart', 'is_favorited')
+        fields = (
+            'tags',
+            'author',
+            'is_in_shopping_cart',
+            'is_favorited',
+            'search',
+        )
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию рецепта.
+
+        Использует индексированный `search_vector` и добавляет аннотацию
+        `search_rank` для сортировки по релевантности.
+        """
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
 
     def filter_shopping_cart(self, queryset, name, value):
         """Фильтрация по наличию в корзине."""
@@ -56,3 +114,18 @@ class RecipeFilter(FilterSet):
         if value:
             return queryset.filter(is_favorited=True)
         return queryset.exclude(is_favorited=True)
+
+
+class RecipeOrderingFilter(OrderingFilter):
+    """Сортировка рецептов, при поиске по умолчанию — по релевантности."""
+
+    search_param = 'search'
+    search_ordering = ('-search_rank', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params
+        if params.get(self.search_param) and not params.get(
+            self.ordering_param
+        ):
+            return self.search_ordering
+        return super().get_ordering(request, queryset, view)
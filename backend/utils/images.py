@@ -0,0 +1,203 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from utils.constants import IMAGE_DERIVATIVE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+derivative_executor = ThreadPoolExecutor(
+    IMAGE_DERIVATIVE_WORKERS, thread_name_prefix='derivatives'
+)
+"""Пул потоков процесса для построения копий вне запроса."""
+
+IMAGE_FORMATS = {
+    'jpeg': ('JPEG', 'jpg', {'quality': 85, 'optimize': True}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+}
+"""Форматы производных изображений: формат Pillow, расширение, опции."""
+
+
+def render_derivatives(source, sizes):
+    """Возвращает уменьшенные копии изображения в JPEG и WebP.
+
+    `sizes` — словарь `{метка: сторона}`, каждая копия вписывается
+    в квадрат со стороной `сторона` без увеличения. Результат имеет вид
+    `{метка: {формат: байты}}`. Функция не обращается к Django, поэтому
+    ее можно вызывать в отдельных процессах.
+    """
+    largest = max(sizes.values())
+    with Image.open(source) as image:
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        alpha = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if alpha else 'RGB')
+
+    result = {}
+    for label, size in sorted(
+        sizes.items(), key=lambda item: item[1], reverse=True
+    ):
+        image = image.copy()
+        image.thumbnail((size, size))
+        result[label] = {}
+        for fmt, (pil_format, _, options) in IMAGE_FORMATS.items():
+            output = BytesIO()
+            frame = image
+            if pil_format == 'JPEG' and frame.mode == 'RGBA':
+                frame = Image.new('RGB', image.size, 'white')
+                frame.paste(image, mask=image.getchannel('A'))
+            frame.save(output, format=pil_format, **options)
+            result[label][fmt] = output.getvalue()
+    return result
+
+
+def get_derivative_name(name, label, fmt):
+    """Имя файла копии рядом с оригиналом: `photo_small.webp`."""
+    root, _ = os.path.splitext(name)
+    return f'{root}_{label}.{IMAGE_FORMATS[fmt][1]}'
+
+
+def save_derivatives(field_file, sizes, rendered=None):
+    """Сохраняет копии изображения рядом с оригиналом в хранилище поля.
+
+    Возвращает описание для JSON-поля модели:
+    `{'source': оригинал, 'files': {метка: {формат: имя файла}}}`.
+    Уже готовые байты можно передать в `rendered`.
+    """
+    if rendered is None:
+        with field_file.open('rb') as source:
+            rendered = render_derivatives(source, sizes)
+    storage = field_file.storage
+    files = {
+        label: {
+            fmt: storage.save(
+                get_derivative_name(field_file.name, label, fmt),
+                ContentFile(content),
+            )
+            for fmt, content in formats.items()
+        }
+        for label, formats in rendered.items()
+    }
+    return {'source': field_file.name, 'files': files}
+
+
+def delete_derivatives(variants, storage=default_storage):
+    """Удаляет из хранилища файлы, перечисленные в описании копий."""
+    for formats in (variants or {}).get('files', {}).values():
+        for name in formats.values():
+            storage.delete(name)
+
+
+def get_current_variants(variants, field_file):
+    """Возвращает описание копий, только если они построены для файла.
+
+    Пока фоновая задача не перестроила копии, описание относится к
+    прежнему файлу, и его копии скоро будут удалены.
+    """
+    source = field_file.name if field_file else None
+    if not variants or variants.get('source') != source:
+        return {}
+    return variants
+
+
+def get_derivative_urls(variants, request=None, storage=default_storage):
+    """Возвращает URL копий в виде `{метка: {формат: url}}`."""
+    urls = {}
+    for label, formats in (variants or {}).get('files', {}).items():
+        urls[label] = {}
+        for fmt, name in formats.items():
+            url = storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[label][fmt] = url
+    return urls
+
+
+def sync_derivatives(instance, field_name, variants_name, sizes):
+    """Приводит копии изображения в соответствие с загруженным файлом.
+
+    Копии строятся один раз для каждого нового файла: если оригинал не
+    менялся, функция ничего не делает. Описание сохраняется через
+    `update`, чтобы не вызывать сигналы повторно, и выставляется
+    экземпляру модели. Копии прежнего файла удаляются после фиксации
+    транзакции, когда строка уже ссылается на новые. Возвращает True,
+    если копии были перестроены.
+    """
+    field_file = getattr(instance, field_name)
+    variants = getattr(instance, variants_name) or {}
+    source = field_file.name if field_file else None
+    if variants.get('source') == source:
+        return False
+    new_variants = save_derivatives(field_file, sizes) if source else {}
+    setattr(instance, variants_name, new_variants)
+    type(instance)._default_manager.filter(pk=instance.pk).update(
+        **{variants_name: new_variants}
+    )
+    transaction.on_commit(
+        partial(delete_derivatives, variants, field_file.storage)
+    )
+    return True
+
+
+def rebuild_derivatives(
+    model, pk, field_name, variants_name, sizes, on_change=None
+):
+    """Перестраивает копии изображения объекта по его текущей строке.
+
+    Строка перечитывается под блокировкой, поэтому параллельные задачи
+    для одного объекта не строят копии дважды. `on_change` вызывается,
+    если копии изменились, — например, чтобы сбросить кеши ответов.
+    """
+    close_old_connections()
+    try:
+        with transaction.atomic():
+            instance = (
+                model._default_manager.select_for_update()
+                .only('pk', field_name, variants_name)
+                .filter(pk=pk)
+                .first()
+            )
+            changed = instance is not None and sync_derivatives(
+                instance, field_name, variants_name, sizes
+            )
+        if changed and on_change is not None:
+            on_change()
+    except Exception:
+        logger.exception(
+            'Не удалось построить копии %s %s', model.__name__, pk
+        )
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(
+    instance, field_name, variants_name, sizes, on_change=None
+):
+    """Ставит построение копий в фоновый пул после фиксации транзакции.
+
+    Запрос не ждет уменьшения изображений, а при откате транзакции
+    задача не запускается и файлы не трогаются. Пока копии не готовы,
+    поле с ними пустое или описывает прежний файл; копии, потерянные
+    при остановке процесса, строит команда generate_image_variants.
+    """
+    field_file = getattr(instance, field_name)
+    variants = getattr(instance, variants_name) or {}
+    if variants.get('source') == (field_file.name if field_file else None):
+        return
+    job = partial(
+        rebuild_derivatives,
+        type(instance),
+        instance.pk,
+        field_name,
+        variants_name,
+        sizes,
+        on_change,
+    )
+    transaction.on_commit(partial(derivative_executor.submit, job))
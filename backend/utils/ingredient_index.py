@@ -0,0 +1,155 @@
+import threading
+import time
+from array import array
+
+from cooking.models import Ingredient
+from utils.constants import (
+    INGREDIENT_INDEX_CHECK_INTERVAL,
+    INGREDIENT_INDEX_MAX_SUFFIXES,
+    INGREDIENT_SEARCH_LIMIT,
+)
+from utils.routers import primary_reads
+from utils.versions import get_version
+
+INGREDIENTS_VERSION = 'ingredients'
+
+
+def normalize(value):
+    """Приводит строку к виду для поиска: регистр, ё и пробелы."""
+    return ' '.join(value.casefold().replace('ё', 'е').split())
+
+
+class IngredientIndex:
+    """Локальный для процесса поисковый индекс ингредиентов.
+
+    Хранит префиксное дерево нормализованных названий и отсортированный
+    массив суффиксов для поиска по вхождению. В каждом узле дерева лежат
+    позиции ингредиентов в алфавитном порядке, поэтому выдача по
+    префиксу — это спуск по дереву и срез списка, без обращения к БД.
+    Суффикс хранится парой (позиция названия, смещение), а не копией
+    строки. Если суффиксов больше INGREDIENT_INDEX_MAX_SUFFIXES, массив
+    не строится и поиск по вхождению идет в БД.
+
+    Индекс перестраивается, когда меняется версия INGREDIENTS_VERSION.
+    Версия сверяется не чаще раза в INGREDIENT_INDEX_CHECK_INTERVAL
+    секунд, поэтому изменения каталога видны с такой задержкой.
+    """
+
+    def __init__(self):
+        """Создает пустой индекс, он строится при первом поиске."""
+        self._lock = threading.Lock()
+        self._state = None
+        self._checked = 0
+
+    def build(self):
+        """Строит индекс по всему каталогу ингредиентов."""
+        items = [
+            {'id': pk, 'name': name, 'measurement_unit': unit}
+            for pk, name, unit in Ingredient.objects.order_by(
+                'name', 'id'
+            ).values_list('id', 'name', 'measurement_unit')
+        ]
+        names = [normalize(item['name']) for item in items]
+        trie = {}
+        for position, name in enumerate(names):
+            node = trie
+            for char in name:
+                node = node.setdefault(char, {})
+                node.setdefault(None, []).append(position)
+        return items, names, trie, self.build_suffixes(names)
+
+    def build_suffixes(self, names):
+        """Строит массив суффиксов названий или None сверх предела.
+
+        Возвращает два параллельных массива: позиции названий и смещения
+        начала суффикса, отсортированные по тексту суффикса.
+        """
+        if sum(len(name) for name in names) > INGREDIENT_INDEX_MAX_SUFFIXES:
+            return None
+        pairs = [
+            (position, start)
+            for position, name in enumerate(names)
+            for start in range(1, len(name))
+        ]
+        pairs.sort(key=lambda pair: names[pair[0]][pair[1]:])
+        return (
+            array('I', (position for position, _ in pairs)),
+            array('I', (start for _, start in pairs)),
+        )
+
+    def get_state(self):
+        state = self._state
+        now = time.monotonic()
+        if (
+            state is not None
+            and now - self._checked < INGREDIENT_INDEX_CHECK_INTERVAL
+        ):
+            return state
+        version = get_version(INGREDIENTS_VERSION)
+        if state is None or state[0] != version:
+            with self._lock:
+                state = self._state
+                if state is None or state[0] != version:
+                    with primary_reads():
+                        state = (version, *self.build())
+                    self._state = state
+        self._checked = now
+        return state
+
+    def find_suffixes(self, names, suffixes, query):
+        """Перебирает позиции названий, содержащих `query` не с начала."""
+        positions, offsets = suffixes
+        size = len(query)
+        low, high = 0, len(positions)
+        while low < high:
+            middle = (low + high) // 2
+            offset = offsets[middle]
+            if names[positions[middle]][offset:offset + size] < query:
+                low = middle + 1
+            else:
+                high = middle
+        while low < len(positions) and names[positions[low]].startswith(
+            query, offsets[low]
+        ):
+            yield positions[low]
+            low += 1
+
+    def search(self, query, limit=INGREDIENT_SEARCH_LIMIT):
+        """Возвращает ингредиенты, название которых содержит `query`.
+
+        Сначала идут совпадения по началу названия, затем по вхождению,
+        внутри каждой группы — по алфавиту.
+        """
+        _, items, names, trie, suffixes = self.get_state()
+        query = normalize(query)
+        if not query:
+            return []
+
+        node = trie
+        for char in query:
+            node = node.get(char)
+            if node is None:
+                break
+        found = node[None][:limit] if node is not None else []
+
+        if len(found) < limit and suffixes is None:
+            result = [items[position] for position in found]
+            result.extend(
+                Ingredient.objects.filter(name__icontains=query)
+                .exclude(id__in=[item['id'] for item in result])
+                .order_by('name', 'id')
+                .values('id', 'name', 'measurement_unit')[
+                    :limit - len(found)
+                ]
+            )
+            return result
+
+        if len(found) < limit:
+            contains = set(self.find_suffixes(names, suffixes, query))
+            contains.difference_update(found)
+            found.extend(sorted(contains)[:limit - len(found)])
+
+        return [items[position] for position in found]
+
+
+ingredient_index = IngredientIndex()
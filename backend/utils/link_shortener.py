@@ -1,20 +1,77 @@
-import hashlib
+import string
+
 from cooking.models import ShortenedURL
+from utils.constants import SHORT_LINK_CACHE_SIZE
+from utils.lru import LRUCache
+
+BASE62_ALPHABET = string.digits + string.ascii_letters
+
+
+def encode_base62(number: int) -> str:
+    """Кодирует неотрицательное число в строку base62."""
+    if number == 0:
+        return BASE62_ALPHABET[0]
+    digits = []
+    while number:
+        number, remainder = divmod(number, len(BASE62_ALPHABET))
+        digits.append(BASE62_ALPHABET[remainder])
+    return ''.join(reversed(digits))
 
 
 class LinkShortener:
-    """Класс для реализации метода сокращения ссылок, использующий hash."""
+    """Класс для сокращения ссылок на рецепты.
+
+    Короткий ключ — это id рецепта в base62, поэтому ключи разных рецептов
+    не совпадают. Разрешение ключей кешируется в LRU-кеше процесса.
+    """
+
+    def __init__(self, cache_size: int = SHORT_LINK_CACHE_SIZE):
+        """Создает сокращатель с кешем на `cache_size` ключей."""
+        self.cache = LRUCache(cache_size)
+
+    @staticmethod
+    def get_recipe_url(recipe_id: int) -> str:
+        return f'/recipes/{recipe_id}/'
 
-    def shorten_url(self, full_url: str) -> str:
-        """Создание короткого URL на основе хеширования полного URL."""
-        short_key = hashlib.md5(full_url.encode()).hexdigest()[:6]
+    def shorten_recipe_url(self, recipe_id: int) -> str:
+        """Возвращает короткий ключ рецепта, создавая его при необходимости.
+
+        Для рецептов, у которых уже есть ключ старого формата, он
+        сохраняется, чтобы опубликованные ссылки продолжали работать.
+        """
+        full_url = self.get_recipe_url(recipe_id)
         short_link, _ = ShortenedURL.objects.get_or_create(
-            full_url=full_url, defaults={'short_key': short_key}
+            full_url=full_url,
+            defaults={'short_key': encode_base62(recipe_id)},
         )
+        self.cache.set(short_link.short_key, full_url)
         return short_link.short_key
 
-    def restore_url(self, short_key: str) -> str:
-        try:
-            return ShortenedURL.objects.get(short_key=short_key).full_url
-        except ShortenedURL.DoesNotExist:
-            return 'URL не найден'
+    def restore_url(self, short_key: str):
+        """Возвращает полный URL по ключу или None, если ключа нет."""
+        full_url = self.cache.get(short_key)
+        if full_url is None:
+            full_url = (
+                ShortenedURL.objects.filter(short_key=short_key)
+                .values_list('full_url', flat=True)
+                .first()
+            )
+            if full_url is not None:
+                self.cache.set(short_key, full_url)
+        return full_url
+
+    def forget_recipe_url(self, recipe_id: int):
+        """Удаляет короткие ссылки удаленного рецепта.
+
+        Ссылки не связаны с рецептом внешним ключом, поэтому каскадное
+        удаление их не затрагивает.
+        """
+        links = ShortenedURL.objects.filter(
+            full_url=self.get_recipe_url(recipe_id)
+        )
+        for short_key in links.values_list('short_key', flat=True):
+            self.cache.delete(short_key)
+        links.delete()
+
+
+link_shortener = LinkShortener()
@@ -0,0 +1,85 @@
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from account.models import Follow
+from cooking.models import Recipe
+
+SUBSCRIPTIONS_KEY = '_subscribed_ids'
+AUTHOR_RECIPES_KEY = '_author_recipes'
+
+
+def load_once(context, key, loader):
+    """Возвращает результат `loader`, вычисленный один раз на контекст.
+
+    Контекст сериализатора общий для корневого сериализатора, его
+    `ListSerializer` и всех вложенных полей, поэтому значение, сохраненное
+    в нем, переиспользуется при сериализации всей страницы.
+    """
+    if key not in context:
+        context[key] = loader()
+    return context[key]
+
+
+def get_subscribed_ids(context):
+    """Возвращает множество id авторов, на которых подписан пользователь.
+
+    Подписки загружаются одним запросом на весь контекст сериализатора,
+    так что количество запросов не зависит от размера страницы.
+    """
+    request = context.get('request')
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return frozenset()
+    return load_once(
+        context,
+        SUBSCRIPTIONS_KEY,
+        lambda: frozenset(
+            Follow.objects.filter(user=user).values_list(
+                'following_id', flat=True
+            )
+        ),
+    )
+
+
+def load_author_recipes(author_ids, limit=None):
+    """Последние рецепты и число рецептов каждого автора одним запросом.
+
+    ROW_NUMBER() нумерует рецепты внутри автора от новых к старым, а
+    COUNT(*) по тому же окну дает общее число рецептов, поэтому число
+    считается в том же проходе, что и выборка первых `limit` рецептов.
+    Возвращает словарь {id автора: (рецепты, число рецептов)}.
+    """
+    recipes = (
+        Recipe.objects.filter(author_id__in=author_ids)
+        .only(
+            'id', 'author', 'name', 'image', 'image_variants', 'cooking_time'
+        )
+        .annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F('author_id'),
+                order_by=(F('pub_date').desc(), F('id').desc()),
+            ),
+            total=Window(Count('id'), partition_by=F('author_id')),
+        )
+        .order_by('author_id', 'position')
+    )
+    if limit is not None:
+        recipes = recipes.filter(position__lte=max(limit, 1))
+    loaded = {}
+    for recipe in recipes:
+        author_recipes, _ = loaded.setdefault(
+            recipe.author_id, ([], recipe.total)
+        )
+        if limit is None or len(author_recipes) < limit:
+            author_recipes.append(recipe)
+    return loaded
+
+
+def get_author_recipes(context, author_ids, limit=None):
+    """Рецепты авторов, загруженные один раз на контекст сериализатора."""
+    return load_once(
+        context,
+        AUTHOR_RECIPES_KEY,
+        lambda: load_author_recipes(author_ids, limit),
+    )
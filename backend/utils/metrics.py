@@ -0,0 +1,131 @@
+import os
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from utils.constants import METRICS_QUERY_BUCKETS, METRICS_SIZE_BUCKETS
+
+UNRESOLVED_VIEW = '<unresolved>'
+"""Метка запросов, для которых не нашлось маршрута."""
+
+REQUESTS = Counter(
+    'django_http_requests',
+    'Количество HTTP-запросов.',
+    ('view', 'method', 'status'),
+)
+LATENCY = Histogram(
+    'django_http_request_duration_seconds',
+    'Время обработки HTTP-запроса.',
+    ('view', 'method'),
+)
+RESPONSE_SIZE = Histogram(
+    'django_http_response_size_bytes',
+    'Размер тела ответа.',
+    ('view', 'method'),
+    buckets=METRICS_SIZE_BUCKETS,
+)
+QUERIES = Histogram(
+    'django_db_queries_per_request',
+    'Количество SQL-запросов за один HTTP-запрос.',
+    ('view', 'method'),
+    buckets=METRICS_QUERY_BUCKETS,
+)
+QUERY_DURATION = Histogram(
+    'django_db_query_duration_seconds_per_request',
+    'Суммарное время SQL-запросов за один HTTP-запрос.',
+    ('view', 'method'),
+)
+
+
+class QueryRecorder:
+    """Execute-обертка БД, считающая запросы и их суммарное время."""
+
+    def __init__(self):
+        """Создает пустые счетчики."""
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+def get_response_size(response):
+    """Размер тела ответа; у потоковых ответов — из Content-Length."""
+    if response.streaming:
+        length = response.get('Content-Length')
+        return int(length) if length else None
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """Собирает метрики запросов по имени маршрута и методу.
+
+    Имя маршрута берется из resolver_match после обработки запроса,
+    поэтому у запросов к одному эндпоинту с разными id одна метка.
+    SQL-запросы потоковых ответов, выполненные при отдаче тела, не
+    учитываются.
+    """
+
+    def __init__(self, get_response):
+        """Сохраняет следующий обработчик цепочки."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        labels = {
+            'view': match.view_name if match else UNRESOLVED_VIEW,
+            'method': request.method,
+        }
+        REQUESTS.labels(status=response.status_code, **labels).inc()
+        LATENCY.labels(**labels).observe(duration)
+        QUERIES.labels(**labels).observe(recorder.count)
+        QUERY_DURATION.labels(**labels).observe(recorder.duration)
+        size = get_response_size(response)
+        if size is not None:
+            RESPONSE_SIZE.labels(**labels).observe(size)
+        return response
+
+
+def get_registry():
+    """Реестр с метриками всех процессов сервера.
+
+    Если задана переменная PROMETHEUS_MULTIPROC_DIR, воркеры gunicorn
+    пишут метрики в файлы этого каталога, и при каждом запросе они
+    собираются заново; иначе отдаются метрики текущего процесса.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus."""
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
@@ -1,4 +1,4 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 from utils.constants import PAGE_SIZE
 
@@ -9,3 +9,74 @@ class CustomPageNumberPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     page_query_param = 'page'
     page_size = PAGE_SIZE
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Курсорная (keyset) пагинация ленты рецептов.
+
+    Страницы строятся по условию на ключ сортировки вместо OFFSET и без
+    COUNT(*), поэтому глубокие страницы стоят столько же, сколько первая.
+    Поддерживаются сортировки `-id` (по умолчанию) и `-pub_date, id`.
+    Дата публикации ставится при создании и не меняется при
+    редактировании, поэтому рецепт не переходит между страницами.
+    """
+
+    page_size_query_param = 'limit'
+    page_size = PAGE_SIZE
+    ordering = '-id'
+    orderings = {
+        '-id': ('-id',),
+        '-pub_date': ('-pub_date', 'id'),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        return self.orderings.get(
+            request.query_params.get('ordering'), self.orderings[self.ordering]
+        )
+
+
+class RecipePagination(CustomPageNumberPagination):
+    """Пагинация рецептов с опциональным курсорным режимом.
+
+    По умолчанию работает постранично, как раньше. Если в запросе есть
+    параметр `cursor` (для первой страницы можно передать пустой
+    `?cursor=`), выдача переключается на RecipeCursorPagination.
+    """
+
+    cursor_pagination_class = RecipeCursorPagination
+
+    def is_cursor_mode(self, request):
+        return (
+            self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class FeedCursorPagination(CursorPagination):
+    """Курсорная пагинация ленты подписок по записям FeedEntry.
+
+    Страница читается одним диапазонным сканированием индекса
+    (user_id, recipe_id) от позиции курсора. Сортировка фиксирована и
+    не зависит от фильтров сортировки представления.
+    """
+
+    page_size_query_param = 'limit'
+    page_size = PAGE_SIZE
+    ordering = '-recipe_id'
+
+    def get_ordering(self, request, queryset, view):
+        return (self.ordering,)
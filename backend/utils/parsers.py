@@ -0,0 +1,38 @@
+import json
+
+from django.utils.datastructures import MultiValueDict
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+MULTIPART_DATA_FIELD = 'data'
+"""Поле multipart запроса с JSON-частью данных."""
+
+
+class MultiPartJSONParser(MultiPartParser):
+    """Multipart парсер, принимающий вложенные данные в виде JSON.
+
+    Поля формы не умеют передавать списки словарей, поэтому клиент
+    кладет такие данные JSON-строкой в поле `data`, а файлы — отдельными
+    частями запроса. Файлы передаются на диск или в память средствами
+    Django без base64. Запрос без поля `data` разбирается как обычная
+    форма.
+
+    Файлы кладутся прямо в словарь данных: DRF объединяет данные
+    и файлы через `dict.update`, который для MultiValueDict подставил
+    бы списки вместо файлов.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        result = super().parse(stream, media_type, parser_context)
+        if MULTIPART_DATA_FIELD not in result.data:
+            return result
+        try:
+            data = json.loads(result.data[MULTIPART_DATA_FIELD])
+        except ValueError as error:
+            raise ParseError(f'Multipart form parse error - {error}')
+        if not isinstance(data, dict):
+            raise ParseError(
+                f'Поле {MULTIPART_DATA_FIELD} должно содержать JSON-объект.'
+            )
+        data.update(result.files.dict())
+        return DataAndFiles(data, MultiValueDict())
@@ -0,0 +1,71 @@
+from django.db import connection
+
+ADDED = 'added'
+ALREADY_ADDED = 'already_added'
+REMOVED = 'removed'
+NOT_IN_LIST = 'not_in_list'
+NOT_FOUND = 'not_found'
+
+INSERT_SQL = '''
+WITH found AS (
+    SELECT id FROM cooking_recipe WHERE id = ANY(%(recipes)s)
+), added AS (
+    INSERT INTO {table} (user_id, recipe_id)
+    SELECT %(user)s, id FROM found
+    ON CONFLICT DO NOTHING
+    RETURNING recipe_id
+)
+SELECT found.id, added.recipe_id IS NOT NULL
+FROM found LEFT JOIN added ON added.recipe_id = found.id
+'''
+
+DELETE_SQL = '''
+DELETE FROM {table}
+WHERE user_id = %s AND recipe_id = ANY(%s)
+RETURNING recipe_id
+'''
+
+
+def bulk_add(model, user, recipe_ids):
+    """Добавляет рецепты в избранное или корзину (model) одним запросом.
+
+    INSERT ... ON CONFLICT DO NOTHING RETURNING сообщает, какие строки
+    вставлены на самом деле, поэтому статус верен и при параллельном
+    добавлении того же рецепта. Как и в bulk_remove, сигналы post_save
+    не отправляются. Возвращает словарь {id рецепта: статус}.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            INSERT_SQL.format(table=model._meta.db_table),
+            {'user': user.pk, 'recipes': list(recipe_ids)},
+        )
+        found = dict(cursor.fetchall())
+    results = {}
+    for recipe_id in recipe_ids:
+        if recipe_id not in found:
+            results[recipe_id] = NOT_FOUND
+        elif found[recipe_id]:
+            results[recipe_id] = ADDED
+        else:
+            results[recipe_id] = ALREADY_ADDED
+    return results
+
+
+def bulk_remove(model, user, recipe_ids):
+    """Удаляет рецепты из избранного или корзины одним DELETE.
+
+    DELETE ... RETURNING сразу сообщает, какие рецепты были в списке.
+    Сигналы post_delete не отправляются, поэтому зависящие от списка
+    версии кеша вызывающий код сбрасывает сам. Несуществующие рецепты
+    получают статус NOT_IN_LIST. Возвращает словарь {id рецепта: статус}.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            DELETE_SQL.format(table=model._meta.db_table),
+            (user.pk, list(recipe_ids)),
+        )
+        removed = {recipe_id for recipe_id, in cursor.fetchall()}
+    return {
+        recipe_id: REMOVED if recipe_id in removed else NOT_IN_LIST
+        for recipe_id in recipe_ids
+    }
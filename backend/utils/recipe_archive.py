@@ -0,0 +1,114 @@
+import json
+import os
+import uuid
+
+from utils.images import render_derivatives
+
+MANIFEST_FILE = 'manifest.json'
+"""Описание архива: идентификатор и признак завершенной выгрузки."""
+
+RECIPES_FILE = 'recipes.jsonl'
+"""Рецепты архива, по одному JSON-объекту в строке."""
+
+IMAGES_DIR = 'images'
+"""Каталог архива с исходными изображениями рецептов."""
+
+
+def read_json_file(path, default=None):
+    """Читает JSON-файл или возвращает `default`, если его нет."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return default
+
+
+def write_json_file(path, data):
+    """Атомарно записывает JSON-файл через временный файл и rename.
+
+    Прерванная запись оставляет прежнюю версию файла, поэтому по
+    файлам состояния можно продолжить работу после сбоя.
+    """
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
+    os.replace(temporary, path)
+
+
+def open_manifest(directory, restart=False):
+    """Возвращает описание архива, создавая его для нового архива."""
+    path = os.path.join(directory, MANIFEST_FILE)
+    manifest = None if restart else read_json_file(path)
+    if manifest is None:
+        manifest = {'archive': uuid.uuid4().hex, 'completed': False}
+        write_json_file(path, manifest)
+    return manifest
+
+
+def truncate_partial_line(path):
+    """Обрезает недописанную последнюю строку JSONL-файла.
+
+    Возвращает последнюю целую строку или None, если строк нет.
+    Файл читается с конца блоками, поэтому размер файла не важен.
+    """
+    with open(path, 'rb+') as file:
+        end = file.seek(0, os.SEEK_END)
+        tail = b''
+        position = end
+        while position > 0 and tail.count(b'\n') < 2:
+            step = min(64 * 1024, position)
+            position -= step
+            file.seek(position)
+            tail = file.read(step) + tail
+        complete = tail[: tail.rfind(b'\n') + 1]
+        file.truncate(position + len(complete))
+    lines = complete.splitlines()
+    return lines[-1].decode() if lines else None
+
+
+def serialize_recipe(recipe, image):
+    """Представление рецепта в архиве.
+
+    Автор, теги и ингредиенты описываются естественными ключами (email,
+    slug, название с единицей измерения), а не id, чтобы архив можно
+    было загрузить в другую базу. `image` — путь к файлу внутри архива.
+    """
+    author = recipe.author
+    return {
+        'id': recipe.pk,
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'pub_date': recipe.pub_date.isoformat(),
+        'image': image,
+        'author': {
+            'email': author.email,
+            'username': author.username,
+            'first_name': author.first_name,
+            'last_name': author.last_name,
+        },
+        'tags': [
+            {'name': tag.name, 'slug': tag.slug} for tag in recipe.tags.all()
+        ],
+        'ingredients': [
+            {
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            }
+            for item in recipe.recipe_ingredients.all()
+        ],
+    }
+
+
+def render_image_file(path, sizes):
+    """Строит копии изображения из файла для пула процессов.
+
+    Возвращает пару (копии, None) или (None, текст ошибки): исключение
+    одного битого файла не должно останавливать весь пул.
+    """
+    try:
+        with open(path, 'rb') as source:
+            return render_derivatives(source, sizes), None
+    except Exception as error:
+        return None, f'{type(error).__name__}: {error}'
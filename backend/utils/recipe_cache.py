@@ -0,0 +1,60 @@
+from django.core.cache import cache
+
+from cooking.models import Recipe
+from utils.conditional import RECIPES_VERSION
+from utils.constants import RECIPE_CACHE_TIMEOUT
+from utils.ingredient_index import INGREDIENTS_VERSION
+from utils.versions import bump_version, bump_versions, get_versions
+
+RECIPE_VERSION = 'recipe'
+TAGS_VERSION = 'tags'
+
+
+def get_recipe_cache_key(recipe_id, base_url):
+    """Возвращает ключ кеша общей для всех части представления рецепта.
+
+    Ключ включает версию рецепта, версии каталогов тегов и ингредиентов
+    и базовый адрес, от которого строятся абсолютные ссылки.
+    """
+    versions = get_versions(
+        (RECIPE_VERSION, recipe_id), (INGREDIENTS_VERSION,), (TAGS_VERSION,)
+    )
+    return 'recipe:{}:{}:{}'.format(
+        recipe_id, ':'.join(map(str, versions)), base_url
+    )
+
+
+def get_cached_recipe(recipe_id, base_url):
+    """Возвращает закешированное представление рецепта и его ключ."""
+    key = get_recipe_cache_key(recipe_id, base_url)
+    return cache.get(key), key
+
+
+def cache_recipe(key, data):
+    """Сохраняет представление рецепта без учета полей зрителя."""
+    cache.set(key, dict(data), RECIPE_CACHE_TIMEOUT)
+
+
+def reset_recipes(recipe_ids):
+    """Сбрасывает кеш представлений указанных рецептов и их списков."""
+    bump_versions(RECIPE_VERSION, recipe_ids)
+    bump_version(RECIPES_VERSION)
+
+
+def reset_author_recipes(author_id):
+    """Сбрасывает кеш всех рецептов автора после правки его профиля."""
+    reset_recipes(
+        Recipe.objects.filter(author_id=author_id).values_list(
+            'id', flat=True
+        )
+    )
+
+
+def apply_viewer_flags(data, is_favorited, is_in_shopping_cart, subscribed):
+    """Накладывает на общее представление рецепта поля зрителя."""
+    return {
+        **data,
+        'is_favorited': is_favorited,
+        'is_in_shopping_cart': is_in_shopping_cart,
+        'author': {**data['author'], 'is_subscribed': subscribed},
+    }
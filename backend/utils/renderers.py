@@ -0,0 +1,138 @@
+import csv
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageDraw, ImageFont
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+SHOPPING_LIST_TITLE = 'Список покупок'
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """Базовый рендерер списка покупок.
+
+    Принимает итерируемый набор строк `(название, единица, количество)`
+    и отдает файл частями через `stream`. Если `streaming` ложно, файл
+    все равно собирается целиком, и представление отдает его обычным
+    ответом. Ответы с ошибками рендерятся в JSON, чтобы клиент получил
+    читаемое сообщение.
+    """
+
+    charset = 'utf-8'
+    streaming = True
+
+    def stream(self, ingredients):
+        """Генерирует части файла в виде байтов."""
+        raise NotImplementedError
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None and response.exception:
+            response['Content-Type'] = JSONRenderer.media_type
+            return JSONRenderer().render(data)
+        return b''.join(self.stream(data))
+
+    @property
+    def content_type(self):
+        if self.charset:
+            return f'{self.media_type}; charset={self.charset}'
+        return self.media_type
+
+
+class ShoppingListTextRenderer(ShoppingListRenderer):
+    """Список покупок в виде текстового файла."""
+
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, ingredients):
+        for name, unit, amount in ingredients:
+            yield f'{name} ({unit}) — {amount}\n'.encode(self.charset)
+
+
+class Echo:
+    """Псевдобуфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class ShoppingListCSVRenderer(ShoppingListRenderer):
+    """Список покупок в формате CSV."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+    header = ('Ингредиент', 'Единица измерения', 'Количество')
+
+    def stream(self, ingredients):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.header).encode(self.charset)
+        for row in ingredients:
+            yield writer.writerow(row).encode(self.charset)
+
+
+class ShoppingListPDFRenderer(ShoppingListRenderer):
+    """Список покупок в виде PDF-документа.
+
+    Страницы A4 рисуются средствами Pillow шрифтом из настройки
+    SHOPPING_LIST_FONT, поэтому отдельная библиотека для PDF не нужна.
+    Pillow записывает PDF только целиком: таблица ссылок на страницы
+    пишется в конце файла. Поэтому документ собирается в памяти и
+    отдается одной частью, без потоковой выдачи.
+    """
+
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    streaming = False
+    page_size = (1240, 1754)
+    resolution = 150
+    margin = 100
+    font_size = 28
+    line_height = 44
+
+    def get_font(self):
+        try:
+            return ImageFont.truetype(
+                settings.SHOPPING_LIST_FONT, self.font_size
+            )
+        except OSError:
+            return ImageFont.load_default(self.font_size)
+
+    def new_page(self):
+        page = Image.new('L', self.page_size, 255)
+        return page, ImageDraw.Draw(page)
+
+    def stream(self, ingredients):
+        font = self.get_font()
+        lines_per_page = (
+            self.page_size[1] - 2 * self.margin
+        ) // self.line_height
+        lines = [SHOPPING_LIST_TITLE, '']
+        lines.extend(
+            f'{name} ({unit}) — {amount}' for name, unit, amount in ingredients
+        )
+
+        pages = []
+        for start in range(0, len(lines), lines_per_page):
+            page, draw = self.new_page()
+            for number, line in enumerate(
+                lines[start:start + lines_per_page]
+            ):
+                draw.text(
+                    (self.margin, self.margin + number * self.line_height),
+                    line,
+                    font=font,
+                    fill=0,
+                )
+            pages.append(page)
+
+        output = BytesIO()
+        pages[0].save(
+            output,
+            format='PDF',
+            save_all=True,
+            append_images=pages[1:],
+            resolution=self.resolution,
+        )
+        yield output.getvalue()
@@ -0,0 +1,137 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from utils.constants import REPLICA_STICKY_TIME
+
+CACHE_APP_LABEL = 'django_cache'
+"""app_label служебной модели таблицы DatabaseCache."""
+
+replica_reads = ContextVar('replica_reads', default=False)
+"""Разрешено ли читать из реплики в текущем запросе."""
+
+
+@contextmanager
+def primary_reads():
+    """Читает из основной БД внутри блока, даже если реплика разрешена.
+
+    Нужен там, где прочитанное кешируется под только что сброшенной
+    версией: отстающая реплика закрепила бы в кеше старые данные.
+    """
+    token = replica_reads.set(False)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+
+def get_write_key(user_id):
+    """Ключ кеша с отметкой о недавней записи пользователя."""
+    return f'replica-pin:{user_id}'
+
+
+def mark_write(user_id):
+    """Закрепляет чтения пользователя за основной БД.
+
+    Пока реплика может отставать, пользователь должен видеть
+    собственные изменения, поэтому его запросы идут в основную БД
+    REPLICA_STICKY_TIME секунд после последней записи.
+    """
+    cache.set(get_write_key(user_id), True, REPLICA_STICKY_TIME)
+
+
+def has_recent_write(user):
+    """Проверяет, менял ли пользователь данные в последние секунды."""
+    return user.is_authenticated and cache.get(get_write_key(user.pk), False)
+
+
+def get_replica():
+    """Возвращает алиас БД-реплики или None, если она не настроена."""
+    return getattr(settings, 'REPLICA_DATABASE', None)
+
+
+class ReplicaRouter:
+    """Роутер, отправляющий разрешенные чтения в реплику.
+
+    Реплика задается настройкой REPLICA_DATABASE. Чтения уходят в нее
+    только внутри представлений с ReplicaReadMixin и не внутри
+    транзакции; все остальное работает с основной БД. Таблица
+    DatabaseCache всегда читается из основной БД: в кеше лежат версии
+    данных, отстающая копия которых отдала бы устаревшие ответы.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = get_replica()
+        if (
+            replica
+            and model._meta.app_label != CACHE_APP_LABEL
+            and replica_reads.get()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return replica
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """Миксин представления, читающего данные из реплики.
+
+    Решение принимается после аутентификации: безопасные запросы к
+    действиям из `replica_actions` идут в реплику, если пользователь
+    недавно ничего не менял.
+    """
+
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            get_replica()
+            and request.method in SAFE_METHODS
+            and getattr(self, 'action', 'list') in self.replica_actions
+            and not has_recent_write(request.user)
+        ):
+            self.replica_token = replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, 'replica_token', None)
+        if token is not None:
+            replica_reads.reset(token)
+            self.replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReadYourWritesMiddleware:
+    """Отмечает пользователей, выполнивших запрос на изменение данных.
+
+    DRF выставляет аутентифицированного пользователя и исходному
+    запросу Django, поэтому после ответа он доступен здесь.
+    """
+
+    def __init__(self, get_response):
+        """Сохраняет следующий обработчик цепочки."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if (
+            get_replica()
+            and request.method not in SAFE_METHODS
+            and user is not None
+            and user.is_authenticated
+        ):
+            mark_write(user.pk)
+        return response
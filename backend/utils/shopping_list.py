@@ -0,0 +1,45 @@
+from django.core.cache import cache
+
+from cooking.models import ShoppingCart
+from utils.constants import (
+    SHOPPING_LIST_CACHE_MAX_SIZE,
+    SHOPPING_LIST_CACHE_TIMEOUT,
+)
+from utils.versions import bump_versions, get_version
+
+CART_VERSION = 'cart'
+
+
+def get_shopping_list_cache_key(user, file_format):
+    """Возвращает ключ кеша файла списка покупок для текущей корзины."""
+    version = get_version(CART_VERSION, user.pk)
+    return f'shopping_list:{user.pk}:{version}:{file_format}'
+
+
+def reset_shopping_lists(recipe_id):
+    """Сбрасывает версии корзин, в которых лежит рецепт."""
+    bump_versions(
+        CART_VERSION,
+        ShoppingCart.objects.filter(recipe_id=recipe_id).values_list(
+            'user_id', flat=True
+        ),
+    )
+
+
+def cache_stream(chunks, key):
+    """Отдает части файла, параллельно сохраняя его в кеш.
+
+    Файл попадает в кеш, только если поток был прочитан до конца и его
+    размер не превышает SHOPPING_LIST_CACHE_MAX_SIZE.
+    """
+    buffer, size = [], 0
+    for chunk in chunks:
+        if buffer is not None:
+            size += len(chunk)
+            if size > SHOPPING_LIST_CACHE_MAX_SIZE:
+                buffer = None
+            else:
+                buffer.append(chunk)
+        yield chunk
+    if buffer is not None:
+        cache.set(key, b''.join(buffer), SHOPPING_LIST_CACHE_TIMEOUT)
@@ -0,0 +1,143 @@
+import gzip
+import hashlib
+import json
+
+import brotli
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import quote_etag
+
+from cooking.models import Ingredient, Tag
+from utils.constants import (
+    CATALOG_SNAPSHOT_BROTLI_QUALITY,
+    CATALOG_SNAPSHOT_HASH_LENGTH,
+    CATALOG_SNAPSHOT_TIMEOUT,
+)
+from utils.ingredient_index import INGREDIENTS_VERSION
+from utils.recipe_cache import TAGS_VERSION
+from utils.routers import primary_reads
+from utils.versions import get_version
+
+IDENTITY = 'identity'
+"""Кодировка несжатого тела снимка."""
+
+ENCODINGS = ('br', 'gzip')
+"""Поддерживаемые кодировки сжатия в порядке предпочтения."""
+
+
+def choose_encoding(accept_encoding):
+    """Выбирает кодировку снимка по заголовку Accept-Encoding.
+
+    Кодировки с q=0 считаются запрещенными; веса остальных не
+    учитываются, из разрешенных берется первая из ENCODINGS.
+    """
+    accepted = set()
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip().replace(' ', '')
+        if quality.startswith('q=') and not quality[2:].strip('0.'):
+            continue
+        accepted.add(coding.strip().lower())
+    for encoding in ENCODINGS:
+        if encoding in accepted or '*' in accepted:
+            return encoding
+    return IDENTITY
+
+
+class CatalogSnapshot:
+    """Готовое JSON-представление каталога в несжатом и сжатых видах.
+
+    Снимок строится один раз на версию каталога `version_name`: правки
+    в админке и import_data меняют версию, и следующий запрос строит
+    новый снимок. Адрес снимка содержит хеш содержимого, поэтому
+    смена версии без изменения данных адрес не меняет.
+    """
+
+    def __init__(self, name, version_name, queryset, fields):
+        """Описывает каталог: имя, версию, выборку и поля элементов."""
+        self.name = name
+        self.version_name = version_name
+        self.queryset = queryset
+        self.fields = fields
+
+    def get_key(self, *parts):
+        """Ключ кеша снимка из частей: версии или ('hash', хеш)."""
+        return 'snapshot:{}:{}'.format(self.name, ':'.join(map(str, parts)))
+
+    def render(self):
+        """Сериализует каталог так же, как JSONRenderer из DRF."""
+        return json.dumps(
+            list(self.queryset.values(*self.fields)),
+            ensure_ascii=False,
+            separators=(',', ':'),
+        ).encode()
+
+    def build(self):
+        """Строит снимок: хеш содержимого и тело во всех кодировках.
+
+        Каталог читается из основной БД: снимок сохраняется под текущей
+        версией, и данные отстающей реплики остались бы в нем надолго.
+        """
+        with primary_reads():
+            body = self.render()
+        return {
+            'hash': hashlib.sha256(body).hexdigest()[
+                :CATALOG_SNAPSHOT_HASH_LENGTH
+            ],
+            IDENTITY: body,
+            'br': brotli.compress(
+                body,
+                mode=brotli.MODE_TEXT,
+                quality=CATALOG_SNAPSHOT_BROTLI_QUALITY,
+            ),
+            'gzip': gzip.compress(body, compresslevel=9),
+        }
+
+    def get(self):
+        """Возвращает снимок текущей версии каталога, строя его при нужде."""
+        key = self.get_key(get_version(self.version_name))
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = self.build()
+            hash_key = self.get_key('hash', snapshot['hash'])
+            cache.set_many(
+                {key: snapshot, hash_key: snapshot}, CATALOG_SNAPSHOT_TIMEOUT
+            )
+        return snapshot
+
+    def get_by_hash(self, digest):
+        """Возвращает снимок по хешу или None, если такого уже нет."""
+        snapshot = cache.get(self.get_key('hash', digest))
+        if snapshot is None:
+            snapshot = self.get()
+        return snapshot if snapshot['hash'] == digest else None
+
+
+def snapshot_response(snapshot, request):
+    """Отдает снимок в лучшей кодировке, которую принимает клиент."""
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    response = HttpResponse(
+        snapshot[encoding], content_type='application/json'
+    )
+    response['ETag'] = quote_etag(f'{snapshot["hash"]}-{encoding}')
+    if encoding != IDENTITY:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+catalog_snapshots = {
+    'tags': CatalogSnapshot(
+        'tags',
+        TAGS_VERSION,
+        Tag.objects.order_by('id'),
+        ('id', 'name', 'slug'),
+    ),
+    'ingredients': CatalogSnapshot(
+        'ingredients',
+        INGREDIENTS_VERSION,
+        Ingredient.objects.order_by('id'),
+        ('id', 'name', 'measurement_unit'),
+    ),
+}
@@ -0,0 +1,58 @@
+import threading
+
+from cooking.models import Tag
+from utils.recipe_cache import TAGS_VERSION
+from utils.routers import primary_reads
+from utils.versions import get_version
+
+
+class TagRegistry:
+    """Локальный для процесса справочник тегов: слаг и id.
+
+    Тегов немного, поэтому весь справочник держится в памяти и
+    перестраивается одним запросом, когда меняется версия TAGS_VERSION.
+    Фильтры по тегам берут из него допустимые слаги и id без обращения
+    к БД.
+    """
+
+    def __init__(self):
+        """Создает пустой справочник, он строится при первом обращении."""
+        self._lock = threading.Lock()
+        self._state = None
+
+    def build(self):
+        """Загружает слаги и id всех тегов."""
+        return dict(Tag.objects.order_by('slug').values_list('slug', 'id'))
+
+    def get_state(self):
+        version = get_version(TAGS_VERSION)
+        state = self._state
+        if state is None or state[0] != version:
+            with self._lock:
+                state = self._state
+                if state is None or state[0] != version:
+                    with primary_reads():
+                        state = (version, self.build())
+                    self._state = state
+        return state
+
+    def get_choices(self):
+        """Варианты выбора для поля формы: пары (слаг, слаг)."""
+        return [(slug, slug) for slug in self.get_state()[1]]
+
+    def get_ids(self, slugs):
+        """Возвращает id тегов по слагам, неизвестные слаги пропускаются."""
+        ids = self.get_state()[1]
+        return [ids[slug] for slug in slugs if slug in ids]
+
+
+tag_registry = TagRegistry()
+
+
+def get_tag_choices():
+    """Варианты выбора тегов для полей форм.
+
+    Функция, а не метод справочника: django-filter копирует фильтры
+    через deepcopy, а справочник с блокировкой копировать нельзя.
+    """
+    return tag_registry.get_choices()
@@ -0,0 +1,71 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'version:{}'
+
+
+def make_version_key(*parts):
+    """Собирает ключ кеша для версии из частей, например ('cart', 1)."""
+    return VERSION_KEY.format(':'.join(str(part) for part in parts))
+
+
+def get_version(*parts):
+    """Возвращает текущую версию набора данных.
+
+    Версия хранится в кеше как метка времени в наносекундах. Если ключ
+    отсутствует или был вытеснен, создается новая версия: все ранее
+    закешированные по старой версии данные просто перестают читаться.
+    """
+    key = make_version_key(*parts)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(*parts):
+    """Сбрасывает версию набора данных после его изменения.
+
+    Внутри транзакции версия меняется после ее фиксации: иначе
+    параллельный запрос мог бы прочитать еще не измененные данные и
+    закешировать их под новой версией. Вне транзакции — сразу.
+    """
+    key = make_version_key(*parts)
+    transaction.on_commit(
+        lambda: cache.set(key, time.time_ns(), timeout=None)
+    )
+
+
+def bump_versions(prefix, ids):
+    """Сбрасывает версии сразу для нескольких объектов одного типа.
+
+    Как и bump_version, после фиксации транзакции; `ids` вычисляются
+    сразу, пока транзакция видит измененные данные.
+    """
+    keys = [make_version_key(prefix, pk) for pk in ids]
+    if keys:
+        transaction.on_commit(
+            lambda: cache.set_many(
+                dict.fromkeys(keys, time.time_ns()), timeout=None
+            )
+        )
+
+
+def get_versions(*keys):
+    """Возвращает версии нескольких наборов данных за одно обращение.
+
+    Каждый ключ — кортеж частей, как в get_version. Отсутствующие версии
+    создаются так же, как в get_version.
+    """
+    names = [make_version_key(*parts) for parts in keys]
+    versions = cache.get_many(names)
+    missing = [name for name in names if name not in versions]
+    if missing:
+        version = time.time_ns()
+        for name in missing:
+            cache.add(name, version, timeout=None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(name) for name in names]
@@ -10,6 +10,7 @@ const Card = ({
   name = "Без названия",
   id,
   image,
+  image_variants,
   is_favorited,
   is_in_shopping_cart,
   tags,
@@ -46,7 +47,9 @@ const Card = ({
         title={
           <div
             className={styles.card__image}
-            style={{ backgroundImage: `url(${image})` }}
+            style={{
+              backgroundImage: `url(${image_variants?.medium?.webp || image})`,
+            }}
           />
         }
       />
@@ -67,7 +70,11 @@ const Card = ({
           <div
             className={styles["card__author-image"]}
             style={{
-              "background-image": `url(${author.avatar || DefaultImage})`,
+              "background-image": `url(${
+                author.avatar_variants?.small?.webp ||
+                author.avatar ||
+                DefaultImage
+              })`,
             }}
           />
           <div className={styles.card__author}>